@@ -1,82 +1,299 @@
-from flask import Flask, render_template, jsonify, request, redirect, url_for, session, flash, make_response
-from datetime import datetime, timedelta, date
+from flask import (Flask, Blueprint, render_template, jsonify, request, redirect, url_for, session, flash,
+                   Response, current_app)
+from datetime import datetime
 import os
 import secrets
 import pymysql
-from dotenv import load_dotenv
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 
 # Import models and configurations
-from models import db, STContent, STComment, STUser, STLevel, STAutoLogin, STVoteRecord, STViewRecord
+from models import db, STContent, STComment, STUser, STLevel
 from config import Config, config
+from trending import trending_engine, record_vote
+from view_counter import view_counter
+import points  # 포인트 원장 집계 작업 등록
+from leaderboard import leaderboard, serialize_ranking
+from live import live_hub, live_broker, publish_delta, event_stream
+from tasks import start_tasks
+from cache import cached_fragment, index_key, discussion_meta_key, discussion_comments_key
+from search import index_discussion, reindex_discussion, index_comment, search_discussions
+from commands import register_commands
+from metrics import init_metrics
+from assets import init_assets
+from replica import init_replica, read_only
+from membership import email_index, nick_index
+from deletion import soft_delete_discussion, deletion_task
+from auto_login import issue_token, verify_token, extend_token, revoke_user_tokens
 from utils import (get_session_id, add_points, get_user_level_info, 
-                   check_vote_record, save_vote_record, require_login, handle_db_errors)
+                   check_vote_record, get_vote_state, save_vote_record, require_login, handle_db_errors,
+                   encode_cursor, decode_cursor, get_discussion_heat, serialize_discussion,
+                   get_comment_page, decode_comment_cursor, serialize_comment, content_version_changes,
+                   feed_query, page_versions, make_etag, not_modified, with_validators,
+                   conditional_json)
 
 # Initialize
 pymysql.install_as_MySQLdb()
-load_dotenv()
 
-# Create Flask app
-app = Flask(__name__)
+bp = Blueprint('main', __name__)
 
-# Load configuration
-env = os.environ.get('FLASK_ENV', 'development')
-app.config.from_object(config[env])
-app.config['SQLALCHEMY_DATABASE_URI'] = Config.get_database_uri()
-app.config['SECRET_KEY'] = Config.SECRET_KEY
+def create_app(config_name=None):
+    """애플리케이션 팩토리"""
+    app = Flask(__name__)
+    
+    # Load configuration
+    config_name = config_name or os.environ.get('FLASK_ENV', 'development')
+    app.config.from_object(config.get(config_name, config['default']))
+    app.config['SQLALCHEMY_DATABASE_URI'] = Config.get_database_uri()
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = Config.get_engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SECRET_KEY'] = Config.SECRET_KEY
+    init_replica(app)  # 복제 서버 bind는 db.init_app 이전에 설정
+    
+    # Initialize extensions
+    db.init_app(app)
+    init_metrics(app)
+    init_assets(app)
+    
+    # Template helpers
+    app.jinja_env.globals['discussion_heat'] = get_discussion_heat
+    app.jinja_env.globals['user_rank'] = leaderboard.rank
+    
+    app.register_blueprint(bp)
+    
+    # CLI commands
+    register_commands(app)
+    
+    return app
 
-# Initialize extensions
-db.init_app(app)
+def warm_up_pool(app):
+    """fork 이후 워커별 커넥션 풀 준비 (부모 프로세스의 연결은 버리고 미리 연결해 둠)"""
+    with app.app_context():
+        # 원본과 복제 서버(설정된 경우) 모두
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+            connections = []
+            try:
+                for _ in range(Config.DB_POOL_WARMUP):
+                    connections.append(engine.connect())
+            finally:
+                for connection in connections:
+                    connection.close()
+        
+        # 회원가입 중복 확인용 필터와 포인트 순위표 적재 (요청 처리 중에는 적재하지 않음)
+        email_index.load()
+        nick_index.load()
+        leaderboard.rebuild()
+        db.session.remove()
 
+@bp.before_app_request
+def ensure_background_tasks():
+    # 워커 프로세스별 백그라운드 작업 시작 (조회수 일괄 저장 등)
+    start_tasks(current_app._get_current_object())
 
-@app.route('/')
+@bp.route('/')
 def index():
-    # 최신 토론들 가져오기
-    discussions = STContent.query.order_by(STContent.insert_time.desc()).limit(Config.RECENT_DISCUSSIONS_LIMIT).all()
+    def render_topics():
+        # 최신 토론들 가져오기 (작성자와 레벨 정보는 한 번에 로드해서 N+1 방지)
+        discussions = feed_query()\
+            .options(joinedload(STContent.author).joinedload(STUser.level_info))\
+            .limit(Config.RECENT_DISCUSSIONS_LIMIT).all()
+        
+        # 무한 스크롤 시작 커서
+        next_cursor = None
+        if len(discussions) == Config.RECENT_DISCUSSIONS_LIMIT:
+            last = discussions[-1]
+            next_cursor = encode_cursor(last.insert_time, last.id)
+        
+        return {'html': render_template('_topic_list.html', discussions=discussions),
+                'next_cursor': next_cursor}
+    
+    # 토론 목록은 캐시된 조각 사용 (첫 페이지 토론들의 id와 버전이 키에 들어가므로
+    # 목록 밖의 토론이 바뀌어도 그대로 재사용됨)
+    topics = cached_fragment(index_key(page_versions(feed_query(), Config.RECENT_DISCUSSIONS_LIMIT)),
+                             render_topics)
     
     # 현재 사용자의 레벨 정보 가져오기
     user_level = None
     if session.get('user_id'):
         user_level = get_user_level_info(session['user_id'])
     
-    return render_template('index.html', discussions=discussions, user_level=user_level)
+    return render_template('index.html', topics_html=topics['html'], user_level=user_level,
+                           next_cursor=topics['next_cursor'])
+
+def feed_limit():
+    return max(1, min(request.args.get('limit', Config.FEED_PAGE_SIZE, type=int), Config.FEED_MAX_PAGE_SIZE))
+
+def feed_validators():
+    """요청한 페이지에 보일 토론들의 (id, version)만 조회 (작성자 로드/직렬화 전)"""
+    cursor = request.args.get('cursor')
+    position = decode_cursor(cursor, datetime, int) if cursor else None
+    if cursor and position is None:
+        return (cursor,)  # 잘못된 커서는 400 응답
+    limit = feed_limit()
+    return (cursor, limit, page_versions(feed_query(position), limit + 1))
+
+@bp.route('/api/discussions')
+@conditional_json(feed_validators)
+def api_discussions():
+    """토론 피드 API - (insert_time, id) 커서 기반 페이지네이션"""
+    limit = feed_limit()
+    
+    position = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        position = decode_cursor(cursor, datetime, int)
+        if position is None:
+            return jsonify({'success': False, 'message': '잘못된 커서입니다.'}), 400
+    
+    # 다음 페이지 존재 여부 확인을 위해 하나 더 조회
+    discussions = feed_query(position).options(joinedload(STContent.author)).limit(limit + 1).all()
+    has_more = len(discussions) > limit
+    discussions = discussions[:limit]
+    
+    next_cursor = None
+    if has_more:
+        last = discussions[-1]
+        next_cursor = encode_cursor(last.insert_time, last.id)
+    
+    return jsonify({
+        'success': True,
+        'topics': [serialize_discussion(d) for d in discussions],
+        'next_cursor': next_cursor
+    })
+
+@bp.route('/api/search')
+def api_search():
+    """토론/댓글 검색 API (순위순, 페이지 단위)"""
+    query = request.args.get('q', '').strip()
+    page = max(1, request.args.get('page', 1, type=int))
+    if not query:
+        return jsonify({'success': False, 'message': '검색어를 입력해주세요.'}), 400
+    
+    # 검색 결과에 나온 토론들의 버전으로 검증 (직렬화 전)
+    discussions, has_more = search_discussions(query, page=page)
+    etag = make_etag(request.endpoint, query, page, has_more, [(d.id, d.version) for d in discussions])
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    
+    return with_validators(jsonify({
+        'success': True,
+        'topics': [serialize_discussion(d) for d in discussions],
+        'page': page,
+        'has_more': has_more
+    }), etag)
+
+@bp.route('/api/trending')
+@conditional_json(lambda: (trending_engine.get_trending(),))  # 주기적으로 만들어 둔 순위 자체가 검증자
+def api_trending():
+    """기간별 인기순위 API (실시간/TODAY/주간/월간을 한 번에 반환)"""
+    return jsonify({'success': True, 'trending': trending_engine.get_trending()})
+
+@bp.route('/api/stats', methods=['POST'])
+@read_only
+def api_stats():
+    """여러 토론/댓글의 투표수, 조회수, 댓글수를 한 번에 반환 (테이블당 쿼리 1번)"""
+    data = request.get_json(silent=True) or {}
+    try:
+        discussion_ids = {int(i) for i in data.get('discussion_ids') or []}
+        comment_ids = {int(i) for i in data.get('comment_ids') or []}
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': '잘못된 요청입니다.'}), 400
+    
+    if len(discussion_ids) + len(comment_ids) > Config.STATS_MAX_IDS:
+        return jsonify({'success': False, 'message': f'한 번에 최대 {Config.STATS_MAX_IDS}개까지 조회할 수 있습니다.'}), 400
+    
+    discussions = {}
+    if discussion_ids:
+        rows = db.session.query(STContent.id, STContent.chan, STContent.ban,
+                                STContent.view_count, STContent.comment_count)\
+                         .filter(STContent.id.in_(discussion_ids), STContent.is_deleted.is_(False))
+        for id, chan, ban, views, comments in rows:
+            discussions[id] = {'chan': chan or 0, 'ban': ban or 0,
+                               'views': views or 0, 'comments': comments or 0}
+    
+    comments = {}
+    if comment_ids:
+        rows = db.session.query(STComment.id, STComment.vote_plus, STComment.vote_minus)\
+                         .join(STContent, STContent.id == STComment.content_id)\
+                         .filter(STComment.id.in_(comment_ids), STContent.is_deleted.is_(False))
+        for id, vote_plus, vote_minus in rows:
+            comments[id] = {'vote_plus': vote_plus or 0, 'vote_minus': vote_minus or 0}
+    
+    return jsonify({'success': True, 'discussions': discussions, 'comments': comments})
+
+@bp.route('/leaderboard')
+def leaderboard_page():
+    user_level = None
+    around = []
+    if session.get('user_id'):
+        user_level = get_user_level_info(session['user_id'])
+        around = serialize_ranking(leaderboard.around(session['user_id']))
+    
+    return render_template('leaderboard.html', user_level=user_level,
+                           ranking=serialize_ranking(leaderboard.top()), around=around)
 
-@app.route('/login')
+def leaderboard_limit():
+    return min(request.args.get('limit', Config.LEADERBOARD_SIZE, type=int) or Config.LEADERBOARD_SIZE,
+               Config.LEADERBOARD_MAX_SIZE)
+
+def leaderboard_validators():
+    """메모리 순위표에서 보이는 부분만 비교 (닉네임 조회 전)"""
+    user_id = session.get('user_id')
+    return (leaderboard.top(leaderboard_limit()), user_id,
+            leaderboard.around(user_id) if user_id else None)
+
+@bp.route('/api/leaderboard')
+@conditional_json(leaderboard_validators)
+def api_leaderboard():
+    """포인트 순위 API (상위 사용자, 로그인 시 내 순위와 주변 사용자)"""
+    limit = leaderboard_limit()
+    result = {'success': True, 'ranking': serialize_ranking(leaderboard.top(limit))}
+    
+    if session.get('user_id'):
+        result['my_rank'] = leaderboard.rank(session['user_id'])
+        result['around'] = serialize_ranking(leaderboard.around(session['user_id']))
+    
+    return jsonify(result)
+
+@bp.route('/login')
 def login():
     return render_template('login.html')
 
-@app.route('/register')
+@bp.route('/register')
 def register():
     return render_template('register.html')
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     # 자동 로그인 토큰 삭제
     if session.get('user_id'):
-        STAutoLogin.query.filter_by(user_id=session['user_id']).delete()
+        revoke_user_tokens(session['user_id'])
         db.session.commit()
     
     session.clear()
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/api/check-email', methods=['POST'])
+@bp.route('/api/check-email', methods=['POST'])
+@read_only
 def check_email():
     try:
         email = request.json.get('email')
-        existing = STUser.query.filter_by(email=email).first()
-        return jsonify({'available': existing is None})
+        return jsonify({'available': not email_index.exists(email)})
     except Exception as e:
         return jsonify({'available': False, 'error': str(e)}), 500
 
-@app.route('/api/check-nick', methods=['POST'])
+@bp.route('/api/check-nick', methods=['POST'])
+@read_only
 def check_nick():
     try:
         nick = request.json.get('nick')
-        existing = STUser.query.filter_by(nick=nick).first()
-        return jsonify({'available': existing is None})
+        return jsonify({'available': not nick_index.exists(nick)})
     except Exception as e:
         return jsonify({'available': False, 'error': str(e)}), 500
 
-@app.route('/api/register', methods=['POST'])
+@bp.route('/api/register', methods=['POST'])
 def api_register():
     try:
         data = request.get_json()
@@ -84,34 +301,35 @@ def api_register():
         nick = data.get('nick')
         password = data.get('password')
         
-        # 중복 확인
-        if STUser.query.filter_by(email=email).first():
-            return jsonify({'success': False, 'message': '이미 사용중인 이메일입니다.'}), 400
-        
-        if STUser.query.filter_by(nick=nick).first():
-            return jsonify({'success': False, 'message': '이미 사용중인 활동명입니다.'}), 400
-        
-        # 새 사용자 생성
+        # 새 사용자 생성 - 중복은 고유 제약조건으로 감지
         new_user = STUser(
             email=email,
             nick=nick,
             pw=STUser.hash_password(password)
         )
         
-        db.session.add(new_user)
-        db.session.commit()
+        try:
+            db.session.add(new_user)
+            db.session.flush()
+            
+            # 레벨 테이블 초기화 (사용자와 같은 트랜잭션)
+            db.session.add(STLevel(user_id=new_user.id, point=0))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            if STUser.query.filter_by(email=email).first():
+                return jsonify({'success': False, 'message': '이미 사용중인 이메일입니다.'}), 400
+            return jsonify({'success': False, 'message': '이미 사용중인 활동명입니다.'}), 400
         
-        # 레벨 테이블 초기화
-        new_level = STLevel(user_id=new_user.id, point=0)
-        db.session.add(new_level)
-        db.session.commit()
+        email_index.add(email)
+        nick_index.add(nick)
         
         return jsonify({'success': True, 'message': '회원가입이 완료되었습니다.'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
-@app.route('/api/login', methods=['POST'])
+@bp.route('/api/login', methods=['POST'])
 def api_login():
     try:
         data = request.get_json()
@@ -128,21 +346,9 @@ def api_login():
             
             response_data = {'success': True}
             
-            # 자동 로그인 요청 시 토큰 생성
+            # 자동 로그인 요청 시 토큰 생성 (기존 토큰은 덮어씀)
             if auto_login:
-                # 기존 토큰 삭제
-                STAutoLogin.query.filter_by(user_id=user.id).delete()
-                
-                # 새 토큰 생성
-                token = secrets.token_urlsafe(32)
-                expiry = datetime.utcnow() + timedelta(days=30)
-                
-                auto_login_entry = STAutoLogin(
-                    user_id=user.id,
-                    token=token,
-                    expiry=expiry
-                )
-                db.session.add(auto_login_entry)
+                token = issue_token(user.id)
                 db.session.commit()
                 
                 response_data['auto_login_token'] = token
@@ -153,40 +359,35 @@ def api_login():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
-@app.route('/api/auto-login', methods=['POST'])
+@bp.route('/api/auto-login', methods=['POST'])
 def api_auto_login():
     try:
         data = request.get_json()
         email = data.get('email')
         token = data.get('token')
         
-        # 토큰 확인
-        auto_login = STAutoLogin.query.filter_by(token=token).first()
+        # 토큰 확인 (사용자 정보와 함께 한 번에 조회)
+        verified = verify_token(token) if token else None
         
-        if auto_login and auto_login.user.email == email:
-            # 만료 시간 확인
-            if auto_login.expiry > datetime.utcnow():
-                user = auto_login.user
-                session['user_id'] = user.id
-                session['user_nick'] = user.nick
-                session['user_email'] = user.email
+        if verified and verified.email == email:
+            # 만료 시간 확인 (만료된 토큰은 주기 작업이 정리)
+            if not verified.expired:
+                session['user_id'] = verified.user_id
+                session['user_nick'] = verified.nick
+                session['user_email'] = verified.email
                 
-                # 토큰 갱신 (만료 시간 연장)
-                auto_login.expiry = datetime.utcnow() + timedelta(days=30)
-                db.session.commit()
+                # 토큰 갱신 (만료 시간 연장, 연장 간격이 지났을 때만 씀)
+                extend_token(verified)
                 
                 return jsonify({'success': True})
             else:
-                # 만료된 토큰 삭제
-                db.session.delete(auto_login)
-                db.session.commit()
                 return jsonify({'success': False, 'message': '자동 로그인 토큰이 만료되었습니다.'}), 401
         else:
             return jsonify({'success': False, 'message': '유효하지 않은 자동 로그인 정보입니다.'}), 401
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
-@app.route('/api/reset-password', methods=['POST'])
+@bp.route('/api/reset-password', methods=['POST'])
 @handle_db_errors
 def reset_password():
     import string
@@ -211,18 +412,18 @@ def reset_password():
     
     return jsonify({'success': True, 'message': '임시 비밀번호가 발급되었습니다.'})
 
-@app.route('/new-discussion')
+@bp.route('/new-discussion')
 def new_discussion():
     if not session.get('user_id'):
         flash('로그인이 필요합니다.')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     # 현재 사용자의 레벨 정보 가져오기
     user_level = get_user_level_info(session['user_id'])
     
     return render_template('new_discussion.html', user_level=user_level)
 
-@app.route('/api/save-discussion', methods=['POST'])
+@bp.route('/api/save-discussion', methods=['POST'])
 def save_discussion():
     if not session.get('user_id'):
         return jsonify({'success': False, 'message': '로그인이 필요합니다.'}), 401
@@ -240,10 +441,14 @@ def save_discussion():
         )
         
         db.session.add(new_content)
-        db.session.commit()
+        db.session.flush()
+        
+        # 검색 색인
+        index_discussion(new_content.id, new_content.subject, new_content.content)
         
         # 글 작성 포인트
-        add_points(session['user_id'], Config.POINTS_FOR_POST, "글 작성")
+        add_points(session['user_id'], Config.POINTS_FOR_POST, 'post')
+        db.session.commit()
         
         return jsonify({
             'success': True,
@@ -254,111 +459,146 @@ def save_discussion():
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
-@app.route('/discussion/<int:id>')
+@bp.route('/discussion/<int:id>')
 def view_discussion(id):
-    discussion = STContent.query.get_or_404(id)
+    discussion = STContent.query.filter_by(id=id, is_deleted=False).first_or_404()
     
-    # 조회수 증가 (하루에 한 번만)
-    today = date.today()
+    # 조회수 증가 (하루에 한 번만) - 메모리에 모아서 주기적으로 일괄 저장
     user_id = session.get('user_id')
     session_id = get_session_id(session) if not user_id else None
+    view_counter.record(id, user_id=user_id, session_id=session_id)
     
-    # 오늘 이미 조회했는지 확인
-    existing_view = None
-    if user_id:
-        existing_view = STViewRecord.query.filter_by(
-            user_id=user_id,
-            content_id=id,
-            view_date=today
-        ).first()
-    elif session_id:
-        existing_view = STViewRecord.query.filter_by(
-            session_id=session_id,
-            content_id=id,
-            view_date=today
-        ).first()
-    
-    # 오늘 첫 조회인 경우에만 조회수 증가
-    if not existing_view:
-        try:
-            # 조회 기록 저장
-            view_record = STViewRecord(
-                user_id=user_id,
-                session_id=session_id,
-                content_id=id,
-                view_date=today
-            )
-            db.session.add(view_record)
-            
-            # 조회수 증가
-            discussion.view_count += 1
-            db.session.commit()
-        except Exception as e:
-            # 중복 조회 시도 (동시성 문제로 인한 예외 처리)
-            db.session.rollback()
+    # 댓글 정렬 (기본: 추천순)
+    sort_order = 'newest' if request.args.get('sort') == 'newest' else 'best'
     
-    # 투표 기록 확인
-    voted = None
-    session_id = get_session_id(session) if not session.get('user_id') else None
-    vote_record = check_vote_record(session.get('user_id'), session_id, content_id=id)
-    if vote_record:
-        voted = "찬성" if vote_record.vote_type == 'chan' else "반대"
+    # 현재 사용자의 레벨 정보 가져오기
+    user_level = get_user_level_info(user_id) if user_id else None
     
-    # 댓글 정렬 (기본: 추천순)
-    sort_order = request.args.get('sort', 'best')
+    # 토론 버전(투표/댓글/수정 시 증가)과 보는 사람 정보가 같으면 댓글 조회와 렌더링 없이 304
+    # 조회수는 버전에 포함하지 않으므로 다시 확인할 때까지 이전 값이 보일 수 있음
+    etag = make_etag('discussion', id, discussion.version, sort_order, user_id, session_id,
+                     user_level.point if user_level else None, leaderboard.rank(user_id) if user_id else None)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
     
-    if sort_order == 'newest':
-        # 최신순 - 데이터베이스에서 정렬
-        comments = STComment.query.filter_by(content_id=id)\
-                          .order_by(STComment.insert_time.desc()).all()
-    else:
-        # 추천순 - 데이터베이스에서 점수 계산 후 정렬
-        from sqlalchemy import desc, case
-        
-        # 점수별로 정렬 (vote_plus - vote_minus)
-        comments = STComment.query.filter_by(content_id=id)\
-                          .order_by(desc(STComment.vote_plus - STComment.vote_minus),
-                                  desc(STComment.insert_time)).all()
+    def render_comments():
+        # 첫 페이지만 렌더링하고 나머지는 API로 불러옴
+        best_count = 0
+        if sort_order == 'best':
+            # 베스트 댓글은 인덱스로 상위 N개만 따로 조회하고, 목록은 그 다음부터 이어서 조회
+            best_comments, best_cursor = get_comment_page(id, 'best', limit=Config.BEST_COMMENTS_COUNT)
+            best_count = len(best_comments)
+            comments, next_cursor = [], None
+            if best_cursor:
+                last = best_comments[-1]
+                comments, next_cursor = get_comment_page(id, 'best', (last.score, last.insert_time, last.id))
+            comments = best_comments + comments
+        else:
+            comments, next_cursor = get_comment_page(id, sort_order)
         
-        # 베스트 댓글 마킹
-        for i, comment in enumerate(comments):
-            comment.is_best = i < Config.BEST_COMMENTS_COUNT
+        html = render_template('_discussion_comments.html', comments=comments, next_cursor=next_cursor,
+                               sort_order=sort_order, best_count=best_count)
+        return {'html': html, 'next_cursor': next_cursor, 'comment_ids': [c.id for c in comments]}
+    
+    # 작성자 정보와 댓글 목록은 토론 버전별로 캐시된 조각 사용, 개인별 정보는 그 위에 렌더링
+    meta_html = cached_fragment(discussion_meta_key(id, discussion.version),
+                                lambda: render_template('_discussion_meta.html', discussion=discussion))
+    comments_fragment = cached_fragment(discussion_comments_key(id, sort_order, discussion.version),
+                                        render_comments)
+    
+    # 토론과 표시된 댓글들의 투표 기록은 한 번에 조회 (댓글 버튼은 캐시된 조각 위에서 JS로 표시)
+    content_vote, comment_votes = get_vote_state(session.get('user_id'), session_id, content_id=id,
+                                                 comment_ids=comments_fragment.get('comment_ids', ()))
+    voted = None
+    if content_vote:
+        voted = "찬성" if content_vote == 'chan' else "반대"
     
     # 작성자 확인
     is_author = (session.get('user_id') == discussion.user_id) if session.get('user_id') else False
     
-    # 현재 사용자의 레벨 정보 가져오기
-    user_level = None
-    if session.get('user_id'):
-        user_level = get_user_level_info(session['user_id'])
-    
-    return render_template('view_discussion.html', 
+    html = render_template('view_discussion.html', 
                          discussion=discussion, 
                          voted=voted,
-                         comments=comments,
+                         meta_html=meta_html,
+                         comments_html=comments_fragment['html'],
+                         comment_votes=comment_votes,
+                         next_cursor=comments_fragment['next_cursor'],
                          is_author=is_author,
                          sort_order=sort_order,
-                         best_count=3 if sort_order == 'best' else 0,
                          user_level=user_level)
+    return with_validators(html, etag)
+
+@bp.route('/api/discussion/<int:id>/comments')
+def api_comments(id):
+    """댓글 목록 API - 추천순/최신순 커서 기반 페이지네이션"""
+    sort_order = 'newest' if request.args.get('sort') == 'newest' else 'best'
+    limit = request.args.get('limit', Config.COMMENTS_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, Config.COMMENTS_MAX_PAGE_SIZE))
+    
+    version = db.session.query(STContent.version).filter_by(id=id, is_deleted=False).scalar()
+    if version is None:
+        return jsonify({'success': False, 'message': '존재하지 않는 토론입니다.'}), 404
+    
+    cursor = None
+    if request.args.get('cursor'):
+        cursor = decode_comment_cursor(request.args['cursor'], sort_order)
+        if cursor is None:
+            return jsonify({'success': False, 'message': '잘못된 커서입니다.'}), 400
+    
+    # 토론 버전과 보는 사람이 같으면 댓글을 조회하지 않고 304
+    user_id = session.get('user_id')
+    session_id = session.get('session_id') if not user_id else None
+    etag = make_etag('comments', id, version, sort_order, request.args.get('cursor'), limit, user_id, session_id)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    
+    comments, next_cursor = get_comment_page(id, sort_order, cursor, limit)
+    
+    # 이 페이지 댓글들에 대한 투표 기록 (쿼리 1번)
+    _, comment_votes = get_vote_state(user_id, session_id, comment_ids=[c.id for c in comments])
+    
+    result = []
+    for comment in comments:
+        item = serialize_comment(comment)
+        item['voted'] = comment_votes.get(comment.id)
+        result.append(item)
+    
+    return with_validators(jsonify({
+        'success': True,
+        'comments': result,
+        'next_cursor': next_cursor
+    }), etag)
+
+@bp.route('/api/discussion/<int:id>/live')
+def discussion_live(id):
+    """토론 실시간 숫자 변화 (Server-Sent Events)"""
+    if not Config.LIVE_ENABLED:
+        return jsonify({'success': False, 'message': '실시간 갱신이 꺼져 있습니다.'}), 404
+    live_broker.ensure_started()
+    subscription = live_hub.subscribe(id)
+    if subscription is None:
+        return jsonify({'success': False, 'message': '접속자가 많아 실시간 갱신을 사용할 수 없습니다.'}), 503
+    
+    return Response(event_stream(subscription), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-@app.route('/api/vote/<int:id>', methods=['POST'])
+@bp.route('/api/vote/<int:id>', methods=['POST'])
 def vote_discussion(id):
     try:
-        discussion = STContent.query.get_or_404(id)
         vote_type = request.json.get('vote_type')
+        if vote_type not in ('chan', 'ban'):
+            return jsonify({'success': False, 'message': '잘못된 투표 타입'}), 400
+        
+        discussion = db.session.query(STContent.user_id).filter_by(id=id, is_deleted=False).first()
+        if discussion is None:
+            return jsonify({'success': False, 'message': '존재하지 않는 토론입니다.'}), 404
         
         # 자기 글인지 확인
         if session.get('user_id') and session['user_id'] == discussion.user_id:
             return jsonify({'success': False, 'message': '자신이 작성한 글에는 투표할 수 없습니다.'}), 400
         
-        # 중복 투표 확인
-        session_id = get_session_id(session) if not session.get('user_id') else None
-        existing_vote = check_vote_record(session.get('user_id'), session_id, content_id=id)
-        
-        if existing_vote:
-            voted_text = "찬성" if existing_vote.vote_type == 'chan' else "반대"
-            return jsonify({'success': False, 'message': f'이미 {voted_text}를 누르셨습니다.'}), 400
-        
         # 투표자의 레벨에 따른 가중치 계산
         voting_power = 1
         if session.get('user_id'):
@@ -366,26 +606,38 @@ def vote_discussion(id):
             if voter_level:
                 voting_power = voter_level.voting_power
         
-        if vote_type == 'chan':
-            discussion.chan += voting_power
-        elif vote_type == 'ban':
-            discussion.ban += voting_power
-        else:
-            return jsonify({'success': False, 'message': '잘못된 투표 타입'}), 400
+        # 투표 기록 저장 - 중복 투표는 고유 제약조건으로 감지
+        session_id = get_session_id(session) if not session.get('user_id') else None
+        try:
+            save_vote_record(session.get('user_id'), session_id, vote_type, content_id=id)
+        except IntegrityError:
+            db.session.rollback()
+            existing_vote = check_vote_record(session.get('user_id'), session_id, content_id=id)
+            voted_text = "찬성" if existing_vote and existing_vote.vote_type == 'chan' else "반대"
+            return jsonify({'success': False, 'message': f'이미 {voted_text}를 누르셨습니다.'}), 400
+        
+        # 투표수 증가 (DB에서 원자적으로 계산)
+        column = STContent.chan if vote_type == 'chan' else STContent.ban
+        STContent.query.filter_by(id=id).update({column: column + voting_power, **content_version_changes()},
+                                                synchronize_session=False)
         
-        # 투표 기록 저장
-        save_vote_record(session.get('user_id'), session_id, vote_type, content_id=id)
+        # 인기순위 활동 기록
+        record_vote(id)
         
         # 글 작성자에게 투표 포인트
         if discussion.user_id:
-            add_points(discussion.user_id, Config.POINTS_FOR_VOTE_RECEIVED, "내 글에 투표")
+            add_points(discussion.user_id, Config.POINTS_FOR_VOTE_RECEIVED, 'vote_received')
+        
+        # 기록, 투표수, 포인트를 한 번에 커밋
+        db.session.commit()
+        publish_delta(id, **{vote_type: voting_power})
         
         return jsonify({'success': True, 'message': '투표가 완료되었습니다.'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
-@app.route('/api/save-comment', methods=['POST'])
+@bp.route('/api/save-comment', methods=['POST'])
 def save_comment():
     if not session.get('user_id'):
         return jsonify({'success': False, 'message': '로그인이 필요합니다.'}), 401
@@ -396,6 +648,11 @@ def save_comment():
         if not data.get('content'):
             return jsonify({'success': False, 'message': '댓글 내용을 입력해주세요.'}), 400
         
+        discussion = db.session.query(STContent.user_id)\
+                               .filter_by(id=data.get('content_id'), is_deleted=False).first()
+        if discussion is None:
+            return jsonify({'success': False, 'message': '존재하지 않는 토론입니다.'}), 404
+        
         new_comment = STComment(
             content=data['content'],
             content_id=data['content_id'],
@@ -404,69 +661,83 @@ def save_comment():
         )
         
         db.session.add(new_comment)
-        db.session.commit()
+        
+        # 댓글 수 증가 (DB에서 원자적으로 계산)
+        STContent.query.filter_by(id=data['content_id'])\
+            .update({STContent.comment_count: STContent.comment_count + 1, **content_version_changes()},
+                    synchronize_session=False)
+        
+        # 검색 색인
+        index_comment(data['content_id'], data['content'])
         
         # 댓글 작성 포인트
-        add_points(session['user_id'], Config.POINTS_FOR_COMMENT, "댓글 작성")
+        add_points(session['user_id'], Config.POINTS_FOR_COMMENT, 'comment')
         
         # 글 작성자에게 댓글 포인트 +1
-        discussion = STContent.query.get(data['content_id'])
-        if discussion and discussion.user_id != session['user_id']:
-            add_points(discussion.user_id, 1, "내 글에 댓글")
+        author_id = discussion.user_id
+        if author_id and author_id != session['user_id']:
+            add_points(author_id, Config.POINTS_FOR_COMMENT_RECEIVED, 'comment_received')
+        
+        db.session.commit()
+        publish_delta(data['content_id'], comments=1)
         
         return jsonify({'success': True, 'message': '댓글이 저장되었습니다.'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
-@app.route('/edit-discussion/<int:id>')
+@bp.route('/edit-discussion/<int:id>')
 def edit_discussion(id):
     if not session.get('user_id'):
         flash('로그인이 필요합니다.')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
-    discussion = STContent.query.get_or_404(id)
+    discussion = STContent.query.filter_by(id=id, is_deleted=False).first_or_404()
     # 작성자 확인
     if discussion.user_id != session['user_id']:
         flash('수정 권한이 없습니다.')
-        return redirect(url_for('view_discussion', id=id))
+        return redirect(url_for('main.view_discussion', id=id))
     return render_template('edit_discussion.html', discussion=discussion)
 
-@app.route('/api/update-discussion/<int:id>', methods=['POST'])
+@bp.route('/api/update-discussion/<int:id>', methods=['POST'])
 def update_discussion(id):
     if not session.get('user_id'):
         return jsonify({'success': False, 'message': '로그인이 필요합니다.'}), 401
     
     try:
-        discussion = STContent.query.get_or_404(id)
+        discussion = STContent.query.filter_by(id=id, is_deleted=False).first_or_404()
         # 작성자 확인
         if discussion.user_id != session['user_id']:
             return jsonify({'success': False, 'message': '수정 권한이 없습니다.'}), 403
         
         data = request.get_json()
+        old_subject, old_content = discussion.subject, discussion.content
         discussion.subject = data.get('subject', discussion.subject)
         discussion.content = data.get('content', discussion.content)
+        discussion.version = STContent.version + 1
         
+        # 검색 색인 갱신 (바뀐 토큰만 반영)
+        reindex_discussion(id, old_subject, old_content, discussion.subject, discussion.content)
         db.session.commit()
         return jsonify({'success': True, 'message': '수정되었습니다.'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
-@app.route('/api/delete-discussion/<int:id>', methods=['POST'])
+@bp.route('/api/delete-discussion/<int:id>', methods=['POST'])
 @require_login
 @handle_db_errors
 def delete_discussion(id):
     try:
-        discussion = STContent.query.get_or_404(id)
+        discussion = STContent.query.filter_by(id=id, is_deleted=False).first_or_404()
         # 작성자 확인
         if discussion.user_id != session['user_id']:
             return jsonify({'success': False, 'message': '삭제 권한이 없습니다.'}), 403
         
-        # 댓글들도 함께 삭제
-        STComment.query.filter_by(content_id=id).delete()
-        db.session.delete(discussion)
+        # 바로 숨기고 댓글, 투표, 조회 기록 등은 백그라운드에서 나눠서 삭제
+        soft_delete_discussion(discussion)
         db.session.commit()
+        deletion_task.wake()
         
         # 세션에서 작성자 정보 제거
         session.pop(f'author_{id}', None)
@@ -476,23 +747,23 @@ def delete_discussion(id):
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
-@app.route('/api/vote-comment/<int:comment_id>', methods=['POST'])
+@bp.route('/api/vote-comment/<int:comment_id>', methods=['POST'])
 def vote_comment(comment_id):
     try:
-        comment = STComment.query.get_or_404(comment_id)
         vote_type = request.json.get('vote_type')
+        if vote_type not in ('plus', 'minus'):
+            return jsonify({'success': False, 'message': '잘못된 투표 타입'}), 400
+        
+        comment = db.session.query(STComment.user_id, STComment.content_id)\
+                            .join(STContent, STContent.id == STComment.content_id)\
+                            .filter(STComment.id == comment_id, STContent.is_deleted.is_(False)).first()
+        if comment is None:
+            return jsonify({'success': False, 'message': '존재하지 않는 댓글입니다.'}), 404
         
         # 자기 댓글인지 확인
         if session.get('user_id') and session['user_id'] == comment.user_id:
             return jsonify({'success': False, 'message': '자신이 작성한 댓글에는 투표할 수 없습니다.'}), 400
         
-        # 중복 투표 확인
-        session_id = get_session_id(session) if not session.get('user_id') else None
-        existing_vote = check_vote_record(session.get('user_id'), session_id, comment_id=comment_id)
-        
-        if existing_vote:
-            return jsonify({'success': False, 'message': '이미 투표하셨습니다.'}), 400
-        
         # 투표자의 레벨에 따른 가중치 계산
         voting_power = 1
         if session.get('user_id'):
@@ -500,18 +771,30 @@ def vote_comment(comment_id):
             if voter_level:
                 voting_power = voter_level.voting_power
         
+        # 투표 기록 저장 - 중복 투표는 고유 제약조건으로 감지
+        session_id = get_session_id(session) if not session.get('user_id') else None
+        try:
+            save_vote_record(session.get('user_id'), session_id, vote_type, comment_id=comment_id)
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'success': False, 'message': '이미 투표하셨습니다.'}), 400
+        
+        # 추천/비추천 수와 점수 갱신 (DB에서 원자적으로 계산)
         if vote_type == 'plus':
-            comment.vote_plus += voting_power
-            # 댓글 작성자에게 추천 포인트
-            if comment.user_id:
-                add_points(comment.user_id, Config.POINTS_FOR_COMMENT_UPVOTE, "내 댓글에 추천")
-        elif vote_type == 'minus':
-            comment.vote_minus += voting_power
+            changes = {STComment.vote_plus: STComment.vote_plus + voting_power,
+                       STComment.score: STComment.score + voting_power}
         else:
-            return jsonify({'success': False, 'message': '잘못된 투표 타입'}), 400
+            changes = {STComment.vote_minus: STComment.vote_minus + voting_power,
+                       STComment.score: STComment.score - voting_power}
+        STComment.query.filter_by(id=comment_id).update(changes, synchronize_session=False)
+        STContent.query.filter_by(id=comment.content_id).update(content_version_changes(), synchronize_session=False)
         
-        # 투표 기록 저장
-        save_vote_record(session.get('user_id'), session_id, vote_type, comment_id=comment_id)
+        # 댓글 작성자에게 추천 포인트
+        if vote_type == 'plus' and comment.user_id:
+            add_points(comment.user_id, Config.POINTS_FOR_COMMENT_UPVOTE, 'comment_upvote')
+        
+        db.session.commit()
+        publish_delta(comment.content_id, comment_votes={str(comment_id): {f'vote_{vote_type}': voting_power}})
         
         return jsonify({'success': True})
     except Exception as e:
@@ -520,10 +803,8 @@ def vote_comment(comment_id):
 
 
 
-def init_db():
-    with app.app_context():
-        db.create_all()  # 테이블이 없을 때만 생성
-
 if __name__ == '__main__':
-    init_db()
-    app.run(debug=Config.DEBUG, host=Config.HOST, port=Config.PORT)
\ No newline at end of file
+    # 개발 서버 (운영 환경은 gunicorn -c gunicorn.conf.py wsgi:app, DB 준비는 flask init-db)
+    app = create_app()
+    warm_up_pool(app)
+    app.run(debug=Config.DEBUG, host=Config.HOST, port=Config.PORT)
@@ -0,0 +1,162 @@
+"""
+Static asset pipeline - fingerprinted, minified, precompressed builds and negotiated response compression
+"""
+import os
+import re
+import gzip
+import json
+import shutil
+import hashlib
+import logging
+import mimetypes
+from flask import request, send_from_directory
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ASSET_EXTENSIONS = ('.css', '.js')
+
+def minify_css(text):
+    """주석과 불필요한 공백 제거 (선택자의 ' :hover' 같은 공백은 유지)"""
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,])\s*', r'\1', text)
+    text = re.sub(r':\s+', ':', text)
+    return text.replace(';}', '}').strip()
+
+def minify_js(text):
+    """들여쓰기, 빈 줄, 한 줄 주석 제거 (줄바꿈은 세미콜론 자동 삽입 때문에 유지)"""
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+def _minify(path, text):
+    return minify_css(text) if path.endswith('.css') else minify_js(text)
+
+def _write_compressed(path, data):
+    """gzip(.gz)과 brotli(.br, brotli 패키지가 있을 때만) 사전 압축본 생성"""
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    try:
+        import brotli  # 선택 의존성 - 없으면 gzip만 제공
+    except ImportError:
+        return False
+    with open(path + '.br', 'wb') as f:
+        f.write(brotli.compress(data, quality=11))
+    return True
+
+def build_assets(static_folder):
+    """static/ 아래 CSS/JS를 해시 파일명으로 압축해서 dist/에 만들고 manifest 작성
+
+    반환: {원래 경로: dist 경로}
+    """
+    dist = os.path.join(static_folder, Config.ASSETS_DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+
+    manifest = {}
+    brotli_built = False
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist]
+        for name in sorted(files):
+            if not name.endswith(ASSET_EXTENSIONS):
+                continue
+            source = os.path.join(root, name)
+            relative = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, encoding='utf-8') as f:
+                data = _minify(name, f.read()).encode('utf-8')
+
+            stem, ext = os.path.splitext(relative)
+            digest = hashlib.sha256(data).hexdigest()[:Config.ASSETS_HASH_LENGTH]
+            hashed = f'{Config.ASSETS_DIST_DIR}/{stem}.{digest}{ext}'
+            target = os.path.join(static_folder, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(data)
+            brotli_built = _write_compressed(target, data)
+            manifest[relative] = hashed
+
+    with open(os.path.join(dist, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    if not brotli_built:
+        logger.warning("brotli is not installed, built gzip precompressed assets only")
+    return manifest
+
+def load_manifest(static_folder):
+    """빌드된 manifest, 없으면 빈 dict"""
+    path = os.path.join(static_folder, Config.ASSETS_DIST_DIR, 'manifest.json')
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _accepts(encoding):
+    return encoding in request.accept_encodings
+
+def serve_built_asset(static_folder, filename):
+    """해시 파일명 자산 응답 (사전 압축본이 있고 클라이언트가 받으면 그대로 전송, 1년 immutable 캐시)"""
+    mimetype = mimetypes.guess_type(filename)[0]
+    encoding = None
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if _accepts(candidate) and os.path.isfile(os.path.join(static_folder, filename + suffix)):
+            encoding = candidate
+            filename += suffix
+            break
+
+    response = send_from_directory(static_folder, filename, mimetype=mimetype,
+                                   max_age=Config.ASSETS_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    response.cache_control.public = True
+    return response
+
+def compress_response(response):
+    """HTML/JSON 응답을 클라이언트가 받는 경우 gzip 압축 (작은 응답과 스트리밍 응답은 제외)"""
+    if response.mimetype not in Config.COMPRESS_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.status_code < 200 or response.status_code >= 300 or response.direct_passthrough
+            or response.is_streamed or 'Content-Encoding' in response.headers
+            or not _accepts('gzip')):
+        return response
+
+    data = response.get_data()
+    if len(data) < Config.COMPRESS_MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=Config.COMPRESS_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    # 압축된 본문은 바이트가 다르므로 강한 ETag는 약한 ETag로
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def init_assets(app):
+    """url_for('static')을 빌드된 해시 파일명으로 바꾸고, 응답 압축 설정"""
+    if Config.COMPRESS_ENABLED:
+        app.after_request(compress_response)
+
+    manifest = load_manifest(app.static_folder) if Config.ASSETS_USE_MANIFEST else {}
+    # 페이지 ETag에 포함 (빌드가 바뀌면 이전 자산 URL을 가진 페이지를 다시 받도록)
+    app.config['ASSETS_VERSION'] = hashlib.sha1(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:10] \
+        if manifest else ''
+    if not manifest:
+        return
+    logger.info(f"Serving {len(manifest)} built assets from {Config.ASSETS_DIST_DIR}/")
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    default_static = app.view_functions['static']
+    prefix = Config.ASSETS_DIST_DIR + '/'
+
+    def static(filename):
+        if filename.startswith(prefix):
+            return serve_built_asset(app.static_folder, filename)
+        return default_static(filename=filename)
+
+    app.view_functions['static'] = static
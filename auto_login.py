@@ -0,0 +1,97 @@
+"""
+Auto-login token store - hashed tokens, single-query verification, batched expiry extension and sweeping
+"""
+import hashlib
+import secrets
+import logging
+from datetime import datetime, timedelta
+from models import db, STAutoLogin, STUser
+from config import Config
+from tasks import PeriodicTask, register_task
+from utils import upsert_replace
+
+logger = logging.getLogger(__name__)
+
+class VerifiedToken:
+    """확인된 토큰 정보 (세션에 묶이지 않음)"""
+    __slots__ = ('token_hash', 'user_id', 'email', 'nick', 'expiry')
+
+    def __init__(self, token_hash, user_id, email, nick, expiry):
+        self.token_hash = token_hash
+        self.user_id = user_id
+        self.email = email
+        self.nick = nick
+        self.expiry = expiry
+
+    @property
+    def expired(self):
+        return self.expiry <= datetime.utcnow()
+
+
+def hash_token(token):
+    return hashlib.sha256((token or '').encode()).hexdigest()
+
+def issue_token(user_id):
+    """새 토큰 발급 (사용자의 기존 토큰은 덮어써서 다른 기기의 이전 토큰은 무효, 커밋은 호출자가 담당)"""
+    token = secrets.token_urlsafe(32)
+    upsert_replace(STAutoLogin, ['user_id'], {
+        'user_id': user_id,
+        'token_hash': hash_token(token),
+        'expiry': datetime.utcnow() + timedelta(days=Config.AUTO_LOGIN_TOKEN_EXPIRY_DAYS),
+        'created_at': datetime.utcnow()
+    })
+    return token
+
+def revoke_user_tokens(user_id):
+    """사용자 토큰 삭제 (커밋은 호출자가 담당)"""
+    STAutoLogin.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+
+def verify_token(token):
+    """토큰 확인 (사용자 정보와 함께 한 번에 조회), 없으면 None
+
+    로그아웃/재발급은 다른 워커에서도 바로 반영되어야 하므로 프로세스 캐시를 쓰지 않고
+    매번 token_hash 유니크 인덱스로 조회한다.
+    """
+    token_hash = hash_token(token)
+    row = db.session.query(STAutoLogin.user_id, STAutoLogin.expiry, STUser.email, STUser.nick)\
+                    .join(STUser, STUser.id == STAutoLogin.user_id)\
+                    .filter(STAutoLogin.token_hash == token_hash).first()
+    if row is None:
+        return None
+    return VerifiedToken(token_hash, row.user_id, row.email, row.nick, row.expiry)
+
+def extend_token(verified):
+    """만료 시간 연장 (마지막 연장 이후 AUTO_LOGIN_EXTEND_INTERVAL_HOURS가 지났을 때만 DB에 씀)"""
+    new_expiry = datetime.utcnow() + timedelta(days=Config.AUTO_LOGIN_TOKEN_EXPIRY_DAYS)
+    if new_expiry - verified.expiry < timedelta(hours=Config.AUTO_LOGIN_EXTEND_INTERVAL_HOURS):
+        return False
+
+    STAutoLogin.query.filter_by(token_hash=verified.token_hash)\
+                     .update({STAutoLogin.expiry: new_expiry}, synchronize_session=False)
+    db.session.commit()
+    verified.expiry = new_expiry
+    return True
+
+def sweep_expired_tokens(batch_size=None):
+    """만료된 토큰을 배치 단위로 삭제"""
+    batch_size = batch_size or Config.AUTO_LOGIN_SWEEP_BATCH_SIZE
+    deleted = 0
+    while True:
+        ids = [id for (id,) in db.session.query(STAutoLogin.id)
+                                         .filter(STAutoLogin.expiry <= datetime.utcnow())
+                                         .limit(batch_size)]
+        if not ids:
+            break
+        STAutoLogin.query.filter(STAutoLogin.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            break
+
+    if deleted:
+        logger.info(f"Deleted {deleted} expired auto-login tokens")
+    return deleted
+
+
+sweep_task = register_task(PeriodicTask('auto-login-sweep', Config.AUTO_LOGIN_SWEEP_SECONDS,
+                                        sweep_expired_tokens))
@@ -0,0 +1,3 @@
+"""
+Benchmark suite - synthetic data seeding, test-client micro benchmarks and HTTP load tests
+"""
@@ -0,0 +1,151 @@
+"""
+Concurrent HTTP load generator against a running server
+
+    gunicorn -c gunicorn.conf.py wsgi:app   # DATABASE_URL=sqlite:///bench.db
+    python -m bench.load --url http://localhost:5000 --concurrency 32 --duration 30 --output load.json
+"""
+import os
+import re
+import time
+import random
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from bench.report import summarize, write_report
+from bench.seed import bench_email, BENCH_PASSWORD
+
+DEFAULT_MIX = 'index:3,view_discussion:6,vote_discussion:1,save_comment:1,check_nick:1'
+
+# 시나리오 -> /metrics의 엔드포인트 이름
+ENDPOINTS = {
+    'index': 'main.index',
+    'view_discussion': 'main.view_discussion',
+    'vote_discussion': 'main.vote_discussion',
+    'save_comment': 'main.save_comment',
+    'check_nick': 'main.check_nick',
+}
+
+METRIC_LINE = re.compile(r'^(saythat_http_requests_total|saythat_sql_statements_total)\{endpoint="([^"]+)"[^}]*\} (\S+)$')
+
+def scrape_metrics(base_url, token=None):
+    """엔드포인트별 (요청 수, SQL 수) - 서버 워커가 여러 개면 응답한 워커의 값만 보임"""
+    totals = defaultdict(lambda: [0, 0])
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    try:
+        response = requests.get(f'{base_url}/metrics', headers=headers, timeout=5)
+    except requests.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    text = response.text
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            name, endpoint, value = match.groups()
+            totals[endpoint][0 if name == 'saythat_http_requests_total' else 1] += float(value)
+    return totals
+
+def parse_mix(mix):
+    scenarios, weights = [], []
+    for item in mix.split(','):
+        name, weight = item.split(':')
+        scenarios.append(name)
+        weights.append(int(weight))
+    return scenarios, weights
+
+def worker(index, args, scenarios, weights, deadline, results, lock):
+    rng = random.Random(args.seed + index)
+    session = requests.Session()
+    member = requests.Session()
+    email = bench_email(index % args.users + 1)
+    response = member.post(f'{args.url}/api/login', json={'email': email, 'password': BENCH_PASSWORD},
+                           timeout=args.timeout)
+    # 로그인이 안 되면 댓글 작성이 모두 401이 되어 결과가 의미 없으므로 중단
+    if response.status_code != 200 or not response.json().get('success'):
+        raise RuntimeError(f'Login failed for {email} ({response.status_code}): '
+                           f'run bench.seed against the same database first')
+    local = defaultdict(lambda: {'latencies': [], 'errors': 0})
+    
+    while time.perf_counter() < deadline:
+        name = rng.choices(scenarios, weights)[0]
+        discussion_id = rng.randint(1, args.discussions)
+        started = time.perf_counter()
+        try:
+            if name == 'index':
+                response = session.get(f'{args.url}/', timeout=args.timeout)
+            elif name == 'view_discussion':
+                response = session.get(f'{args.url}/discussion/{discussion_id}', timeout=args.timeout)
+            elif name == 'vote_discussion':
+                # 세션 쿠키 없이 보내서 매번 새 익명 투표가 되도록 함
+                response = requests.post(f'{args.url}/api/vote/{discussion_id}',
+                                         json={'vote_type': rng.choice(['chan', 'ban'])}, timeout=args.timeout)
+            elif name == 'save_comment':
+                response = member.post(f'{args.url}/api/save-comment', json={
+                    'content': f'부하 테스트 댓글 {rng.random()}', 'content_id': discussion_id,
+                    'chanban': rng.randint(0, 1)
+                }, timeout=args.timeout)
+            else:
+                response = session.post(f'{args.url}/api/check-nick',
+                                        json={'nick': f'bench{rng.randint(1, args.users * 2)}'}, timeout=args.timeout)
+            failed = response.status_code >= 400
+        except requests.RequestException:
+            failed = True
+        local[name]['latencies'].append(time.perf_counter() - started)
+        local[name]['errors'] += failed
+    
+    with lock:
+        for name, data in local.items():
+            results[name]['latencies'].extend(data['latencies'])
+            results[name]['errors'] += data['errors']
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='동시 HTTP 부하 테스트')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30, help='측정 시간 (초)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='시나리오:가중치 목록')
+    parser.add_argument('--discussions', type=int, default=5000, help='seed에서 만든 토론 수')
+    parser.add_argument('--users', type=int, default=1000, help='seed에서 만든 사용자 수')
+    parser.add_argument('--timeout', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='결과 JSON 파일 경로')
+    parser.add_argument('--metrics-token', default=os.environ.get('METRICS_TOKEN'),
+                        help='서버의 METRICS_TOKEN (없으면 쿼리 수를 수집하지 않음)')
+    args = parser.parse_args(argv)
+    args.url = args.url.rstrip('/')
+    
+    scenarios, weights = parse_mix(args.mix)
+    results = defaultdict(lambda: {'latencies': [], 'errors': 0})
+    lock = threading.Lock()
+    
+    metrics_before = scrape_metrics(args.url, args.metrics_token)
+    started = time.perf_counter()
+    deadline = started + args.duration
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(worker, index, args, scenarios, weights, deadline, results, lock)
+                   for index in range(args.concurrency)]
+        # 작업 스레드에서 난 예외(로그인 실패 등)를 숨기지 않고 그대로 발생시킴
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+    metrics_after = scrape_metrics(args.url, args.metrics_token)
+    
+    summary = {}
+    for name, data in results.items():
+        queries = None
+        endpoint = ENDPOINTS.get(name)
+        if metrics_before is not None and metrics_after is not None and endpoint:
+            requests_delta = metrics_after[endpoint][0] - metrics_before[endpoint][0]
+            queries_delta = metrics_after[endpoint][1] - metrics_before[endpoint][1]
+            queries = round(queries_delta / requests_delta, 2) if requests_delta else None
+        summary[name] = summarize(data['latencies'], elapsed, errors=data['errors'])
+        summary[name]['queries_per_request'] = queries
+    
+    all_latencies = [latency for data in results.values() for latency in data['latencies']]
+    summary['total'] = summarize(all_latencies, elapsed, errors=sum(data['errors'] for data in results.values()))
+    write_report('load', vars(args), summary, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Micro benchmarks through the Flask test client (no network), with per-request SQL counts
+
+    python -m bench.micro --database-url sqlite:///bench.db --iterations 500 --output micro.json
+"""
+import os
+import time
+import random
+import threading
+import argparse
+from sqlalchemy import event, func
+from bench.report import summarize, write_report
+from bench.seed import bench_email, BENCH_PASSWORD
+
+class QueryCounter:
+    """벤치마크 스레드에서 실행된 SQL 문장 수 (백그라운드 작업 제외)"""
+    
+    def __init__(self, engine):
+        self.count = 0
+        self._thread = threading.get_ident()
+        event.listen(engine, 'after_cursor_execute', self._on_execute)
+    
+    def _on_execute(self, *args):
+        if threading.get_ident() == self._thread:
+            self.count += 1
+
+
+def login(client, user_id):
+    response = client.post('/api/login', json={'email': bench_email(user_id), 'password': BENCH_PASSWORD})
+    assert response.get_json().get('success'), response.get_data(as_text=True)
+
+def build_scenarios(app, rng, max_discussion_id, max_user_id):
+    """시나리오 이름 -> 요청 한 번을 보내는 함수"""
+    member = app.test_client()
+    login(member, 1)
+    anon = app.test_client()
+    
+    def index():
+        return anon.get('/')
+    
+    def view_discussion():
+        return anon.get(f'/discussion/{rng.randint(1, max_discussion_id)}')
+    
+    def view_discussion_member():
+        return member.get(f'/discussion/{rng.randint(1, max_discussion_id)}')
+    
+    def vote_discussion():
+        # 중복 투표가 되지 않도록 매번 새 세션으로 투표
+        return app.test_client().post(f'/api/vote/{rng.randint(1, max_discussion_id)}',
+                                      json={'vote_type': rng.choice(['chan', 'ban'])})
+    
+    def save_comment():
+        return member.post('/api/save-comment', json={
+            'content': f'벤치마크 댓글 {rng.random()}', 'content_id': rng.randint(1, max_discussion_id),
+            'chanban': rng.randint(0, 1)
+        })
+    
+    def check_nick():
+        return anon.post('/api/check-nick', json={'nick': f'bench{rng.randint(1, max_user_id * 2)}'})
+    
+    return {
+        'index': index,
+        'view_discussion': view_discussion,
+        'view_discussion_member': view_discussion_member,
+        'vote_discussion': vote_discussion,
+        'save_comment': save_comment,
+        'check_nick': check_nick,
+    }
+
+def run_scenario(request, counter, iterations, warmup):
+    for _ in range(warmup):
+        request()
+    
+    latencies = []
+    errors = 0
+    queries_before = counter.count
+    started = time.perf_counter()
+    for _ in range(iterations):
+        request_started = time.perf_counter()
+        response = request()
+        latencies.append(time.perf_counter() - request_started)
+        if response.status_code >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed, queries=counter.count - queries_before, errors=errors)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Flask 테스트 클라이언트 마이크로 벤치마크')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL', 'sqlite:///bench.db'))
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--scenarios', default='index,view_discussion,view_discussion_member,vote_discussion,save_comment,check_nick')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='결과 JSON 파일 경로')
+    args = parser.parse_args(argv)
+    
+    os.environ['DATABASE_URL'] = args.database_url
+    from app import create_app
+    from models import db, STContent, STUser
+    
+    app = create_app()
+    rng = random.Random(args.seed)
+    results = {}
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+        max_discussion_id = db.session.query(func.max(STContent.id)).scalar() or 0
+        max_user_id = db.session.query(func.max(STUser.id)).scalar() or 0
+        if not max_discussion_id or not max_user_id:
+            parser.error('데이터가 없습니다. 먼저 python -m bench.seed 를 실행하세요.')
+        db.session.remove()
+        
+        scenarios = build_scenarios(app, rng, max_discussion_id, max_user_id)
+        for name in args.scenarios.split(','):
+            results[name] = run_scenario(scenarios[name], counter, args.iterations, args.warmup)
+    
+    write_report('micro', vars(args), results, args.output)
+
+if __name__ == '__main__':
+    main()
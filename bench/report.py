@@ -0,0 +1,54 @@
+"""
+Benchmark result summaries written as JSON so runs can be compared between commits
+"""
+import json
+import math
+import platform
+import subprocess
+from datetime import datetime
+
+def percentile(values, percent):
+    """정렬된 목록의 백분위 값 (nearest-rank)"""
+    if not values:
+        return None
+    rank = math.ceil(percent / 100 * len(values))
+    return values[max(rank, 1) - 1]
+
+def summarize(latencies, elapsed, queries=None, errors=0):
+    """시나리오 하나의 요약 (지연 시간은 ms)"""
+    latencies = sorted(latencies)
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed > 0 else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else None,
+    }
+    if queries is not None:
+        summary['queries_per_request'] = round(queries / len(latencies), 2) if latencies else None
+    return summary
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def write_report(kind, options, results, output=None):
+    """결과를 JSON으로 출력 (output이 있으면 파일에도 저장)"""
+    report = {
+        'kind': kind,
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'python': platform.python_version(),
+        'options': options,
+        'results': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+    return report
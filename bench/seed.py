@@ -0,0 +1,151 @@
+"""
+Synthetic data generator for benchmarks
+
+    python -m bench.seed --database-url sqlite:///bench.db --users 10000 --discussions 50000 \
+        --comments 1000000 --votes 2000000 --views 10000000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam
+
+BATCH_SIZE = 10000
+BENCH_PASSWORD = 'bench-password'  # 생성된 모든 사용자의 비밀번호
+
+WORDS = ['의대', '정원', '확대', '최저임금', '인상', '주4일제', '도입', '원전', '재가동', '수도권',
+         '규제', '게임', '셧다운', '반려견', '보유세', '재택근무', '유지', '기본소득', '필요', '찬성']
+
+def bench_email(index):
+    return f'bench{index}@example.com'
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+def insert_batches(db, model, rows, label):
+    """생성기에서 받은 행을 BATCH_SIZE 단위로 executemany 삽입"""
+    started = time.perf_counter()
+    table = model.__table__
+    batch = []
+    count = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            db.session.execute(table.insert(), batch)
+            db.session.commit()
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+        count += len(batch)
+    print(f'  {label}: {count:,} rows ({time.perf_counter() - started:.1f}s)', file=sys.stderr)
+    return count
+
+def seed(db, users, discussions, comments, votes, views, days=30, seed_value=42):
+    """설정한 양만큼 사용자/토론/댓글/투표/조회 기록 생성 (카운터 컬럼도 일치하게 채움)"""
+    from models import STUser, STLevel, STContent, STComment, STVoteRecord, STViewRecord
+    
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    start = now - timedelta(days=days)
+    password = STUser.hash_password(BENCH_PASSWORD)
+    
+    def random_time():
+        return start + timedelta(seconds=rng.randrange(days * 86400))
+    
+    # 토론별 카운터는 자식 행을 만들면서 미리 계산
+    comment_counts = [0] * (discussions + 1)
+    chan_counts = [0] * (discussions + 1)
+    ban_counts = [0] * (discussions + 1)
+    view_counts = [0] * (discussions + 1)
+    
+    # 인기 토론에 활동이 몰리도록 앞쪽 id에 가중치 (파레토 분포)
+    def pick_discussion():
+        return min(discussions, int(rng.paretovariate(1.2))) if rng.random() < 0.5 else rng.randint(1, discussions)
+    
+    insert_batches(db, STUser, ({
+        'id': i, 'email': bench_email(i), 'nick': f'bench{i}', 'pw': password, 'insert_time': random_time()
+    } for i in range(1, users + 1)), 'users')
+    insert_batches(db, STLevel, ({
+        'user_id': i, 'point': int(rng.paretovariate(1.1) * 10)
+    } for i in range(1, users + 1)), 'levels')
+    
+    insert_batches(db, STContent, ({
+        'id': i, 'subject': sentence(rng, 5), 'content': f'<p>{sentence(rng, 40)}</p>',
+        'user_id': rng.randint(1, users), 'chan': 0, 'ban': 0, 'view_count': 0, 'comment_count': 0,
+        'insert_time': random_time()
+    } for i in range(1, discussions + 1)), 'discussions')
+    
+    def comment_rows():
+        for i in range(1, comments + 1):
+            content_id = pick_discussion()
+            comment_counts[content_id] += 1
+            plus, minus = int(rng.paretovariate(1.5)) - 1, int(rng.paretovariate(2.0)) - 1
+            yield {'id': i, 'user_id': rng.randint(1, users), 'content': sentence(rng, 12),
+                   'content_id': content_id, 'chanban': rng.randint(0, 1), 'vote_plus': plus,
+                   'vote_minus': minus, 'score': plus - minus, 'insert_time': random_time()}
+    insert_batches(db, STComment, comment_rows(), 'comments')
+    
+    def vote_rows():
+        # 비로그인 세션 투표로 만들어서 고유 제약조건과 충돌하지 않게 함
+        for i in range(1, votes + 1):
+            content_id = pick_discussion()
+            vote_type = 'chan' if rng.random() < 0.55 else 'ban'
+            (chan_counts if vote_type == 'chan' else ban_counts)[content_id] += 1
+            yield {'session_id': f'bench-vote-{i}', 'content_id': content_id,
+                   'vote_type': vote_type, 'created_at': random_time()}
+    insert_batches(db, STVoteRecord, vote_rows(), 'votes')
+    
+    def view_rows():
+        for i in range(1, views + 1):
+            content_id = pick_discussion()
+            view_counts[content_id] += 1
+            created_at = random_time()
+            yield {'session_id': f'bench-view-{i}', 'content_id': content_id,
+                   'view_date': created_at.date(), 'created_at': created_at}
+    insert_batches(db, STViewRecord, view_rows(), 'views')
+    
+    updated = 0
+    for first in range(1, discussions + 1, BATCH_SIZE):
+        ids = range(first, min(first + BATCH_SIZE, discussions + 1))
+        db.session.execute(STContent.__table__.update().where(STContent.__table__.c.id == bindparam('b_id')), [
+            {'b_id': i, 'chan': chan_counts[i], 'ban': ban_counts[i],
+             'view_count': view_counts[i], 'comment_count': comment_counts[i]} for i in ids
+        ])
+        db.session.commit()
+        updated += len(ids)
+    print(f'  counters: {updated:,} discussions', file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='벤치마크용 데이터 생성')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL', 'sqlite:///bench.db'))
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--discussions', type=int, default=5000)
+    parser.add_argument('--comments', type=int, default=50000)
+    parser.add_argument('--votes', type=int, default=100000)
+    parser.add_argument('--views', type=int, default=200000)
+    parser.add_argument('--days', type=int, default=30, help='기록을 흩뿌릴 기간 (일)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--drop', action='store_true', help='기존 테이블을 지우고 새로 생성')
+    args = parser.parse_args(argv)
+    
+    os.environ['DATABASE_URL'] = args.database_url
+    from app import create_app
+    from models import db
+    
+    app = create_app()
+    with app.app_context():
+        if args.drop:
+            db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        seed(db, args.users, args.discussions, args.comments, args.votes, args.views,
+             days=args.days, seed_value=args.seed)
+        print(f'Seeded {args.database_url} in {time.perf_counter() - started:.1f}s', file=sys.stderr)
+        print('Run "flask rebuild-search-index" and "flask rebuild-trending" to build derived tables.', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Rendered fragment cache with pluggable backends
+"""
+import os
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from config import Config
+
+class LRUCache:
+    """프로세스 내 LRU 캐시 (TTL 지원)"""
+    
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+    
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class FileSystemCache:
+    """같은 호스트의 워커 프로세스끼리 공유하는 파일 기반 캐시 (공유 캐시 대용)"""
+    
+    PRUNE_EVERY = 1000  # 이만큼 저장할 때마다 오래된 파일 정리
+    
+    def __init__(self, directory, max_age):
+        self.directory = directory
+        self.max_age = max_age
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+    
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                expires_at, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires_at < time.time():
+            self.delete(key)
+            return None
+        return value
+    
+    def set(self, key, value, ttl):
+        # 임시 파일에 쓴 뒤 교체해서 다른 프로세스가 쓰다 만 파일을 읽지 않도록 함
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((time.time() + ttl, value), f)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+    
+    def prune(self):
+        """max_age보다 오래된 파일 삭제 (키가 바뀌어 다시 읽히지 않는 조각 정리)"""
+        threshold = time.time() - self.max_age
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < threshold:
+                    os.remove(path)
+            except OSError:
+                pass
+    
+    def delete(self, *keys):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+    
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class NullCache:
+    """캐시 비활성화"""
+    
+    def get(self, key):
+        return None
+    
+    def set(self, key, value, ttl):
+        pass
+    
+    def delete(self, *keys):
+        pass
+    
+    def clear(self):
+        pass
+
+
+def create_cache(backend=None):
+    """설정에 맞는 캐시 백엔드 생성"""
+    backend = backend or Config.FRAGMENT_CACHE_BACKEND
+    if backend == 'lru':
+        return LRUCache(Config.FRAGMENT_CACHE_MAX_ENTRIES)
+    if backend == 'filesystem':
+        return FileSystemCache(Config.FRAGMENT_CACHE_DIR, Config.FRAGMENT_CACHE_TTL)
+    if backend == 'null':
+        return NullCache()
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+fragment_cache = create_cache()
+
+# 키에 목록/토론의 버전을 넣으므로 다른 워커에서 바뀐 내용도 바로 새 키로 렌더링됨
+# (이전 버전의 조각은 TTL이 지나거나 LRU에서 밀려나면 사라짐)
+def index_key(versions):
+    return f'index:{hashlib.sha1(repr(versions).encode()).hexdigest()}'
+
+def discussion_meta_key(content_id, version):
+    return f'discussion:{content_id}:meta:v{version}'
+
+def discussion_comments_key(content_id, sort_order, version):
+    return f'discussion:{content_id}:comments:{sort_order}:v{version}'
+
+def cached_fragment(key, render, ttl=None):
+    """캐시된 조각을 반환하고, 없으면 렌더링해서 저장"""
+    value = fragment_cache.get(key)
+    if value is None:
+        value = render()
+        fragment_cache.set(key, value, ttl or Config.FRAGMENT_CACHE_TTL)
+    return value
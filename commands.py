@@ -0,0 +1,141 @@
+"""
+Maintenance CLI commands (flask <command>)
+"""
+import click
+
+def create_database(uri):
+    """MySQL 데이터베이스가 없으면 생성 (SQLite는 파일이 자동으로 생성됨)"""
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.engine import make_url
+    
+    url = make_url(uri)
+    if url.get_backend_name() != 'mysql':
+        return False
+    
+    engine = create_engine(url.set(database=None))
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(f"CREATE DATABASE IF NOT EXISTS `{url.database}` "
+                              "CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"))
+    finally:
+        engine.dispose()
+    return True
+
+def register_commands(app):
+    """유지보수용 CLI 명령 등록"""
+    
+    @app.cli.command('init-db')
+    def init_db():
+        """데이터베이스와 테이블 생성 (배포 시 한 번 실행)"""
+        from models import db
+        if create_database(app.config['SQLALCHEMY_DATABASE_URI']):
+            click.echo('Created database if missing.')
+        db.create_all()  # 테이블이 없을 때만 생성
+        click.echo('Created tables if missing.')
+    
+    @app.cli.command('migrate-schema')
+    def migrate_schema_command():
+        """이전 버전으로 만든 데이터베이스에 빠진 테이블/컬럼/인덱스 추가 (업그레이드 배포 시 실행)"""
+        from migrations import migrate_schema
+        applied = migrate_schema()
+        for description in applied:
+            click.echo(description)
+        click.echo(f'Applied {len(applied)} migration steps.')
+    
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """CSS/JS를 해시 파일명으로 압축해서 static/dist에 생성 (배포 시 실행)"""
+        from assets import build_assets
+        manifest = build_assets(app.static_folder)
+        click.echo(f'Built {len(manifest)} assets. Restart workers to use them.')
+    
+    @app.cli.command('rebuild-trending')
+    def rebuild_trending():
+        """투표/조회 기록으로 인기순위 버킷 재생성"""
+        from trending import rebuild_trending_buckets
+        count = rebuild_trending_buckets()
+        click.echo(f'Rebuilt {count} trending buckets. Restart workers to reload rankings.')
+    
+    @app.cli.command('prune-trending')
+    def prune_trending():
+        """기간이 지난 인기순위 버킷 삭제"""
+        from trending import prune_trending_buckets
+        count = prune_trending_buckets()
+        click.echo(f'Deleted {count} expired trending buckets.')
+    
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search():
+        """토론/댓글 검색 색인 재생성"""
+        from search import rebuild_search_index
+        count = rebuild_search_index()
+        click.echo(f'Indexed {count} discussions.')
+    
+    @app.cli.command('rollup-views')
+    @click.option('--retention-days', type=int, default=None,
+                  help='원본 조회 기록 보관 기간 (기본값: VIEW_RECORD_RETENTION_DAYS)')
+    def rollup_views(retention_days):
+        """보관 기간이 지난 조회 기록을 일별 집계로 압축"""
+        from datetime import date, timedelta
+        from view_rollup import rollup_view_records
+        cutoff = None
+        if retention_days is not None:
+            cutoff = date.today() - timedelta(days=max(1, retention_days))
+        count = rollup_view_records(cutoff)
+        click.echo(f'Compacted {count} view records.')
+    
+    @app.cli.command('recount')
+    def recount():
+        """비정규화된 카운터 재계산 (토론의 댓글 수, 댓글 점수)
+
+        컬럼이 없는 이전 데이터베이스는 먼저 flask migrate-schema로 컬럼을 추가해야 한다.
+        """
+        from models import db
+        from migrations import backfill_comment_count, backfill_comment_score
+        connection = db.session.connection()
+        backfill_comment_count(connection)
+        backfill_comment_score(connection)
+        db.session.commit()
+        click.echo('Recounted comment counts and comment scores.')
+    
+    @app.cli.command('purge-deleted')
+    @click.option('--max-passes', type=int, default=1000, help='최대 실행 횟수 (한 번에 DELETION_MAX_CHUNKS_PER_RUN개 트랜잭션)')
+    def purge_deleted(max_passes):
+        """삭제 표시된 토론의 남은 삭제 작업을 끝까지 처리 (진행이 멈추면 중단하고 남은 작업 출력)"""
+        from deletion import run_deletion_jobs, pending_deletion_jobs
+        total = 0
+        pending = pending_deletion_jobs()
+        for _ in range(max_passes):
+            if not pending:
+                break
+            deleted = run_deletion_jobs()
+            total += deleted
+            previous, pending = pending, pending_deletion_jobs()
+            # 지운 행도 없고 단계도 그대로면 더 실행해도 진행되지 않음
+            if not deleted and pending == previous:
+                break
+        click.echo(f'Deleted {total} rows.')
+        if pending:
+            for job_id, content_id, stage in pending:
+                click.echo(f'Stuck deletion job {job_id} (discussion {content_id}, stage {stage})', err=True)
+            raise SystemExit(1)
+    
+    @app.cli.command('aggregate-points')
+    def aggregate_points_command():
+        """포인트 원장의 미반영 항목을 레벨 포인트에 반영"""
+        from points import aggregate_points
+        count = aggregate_points()
+        click.echo(f'Applied {count} ledger entries.')
+    
+    @app.cli.command('seed-point-ledger')
+    def seed_point_ledger_command():
+        """원장 도입 이전 포인트를 기존 포인트 항목으로 기록"""
+        from points import seed_point_ledger
+        count = seed_point_ledger()
+        click.echo(f'Seeded opening balances for {count} users.')
+    
+    @app.cli.command('rebuild-points')
+    def rebuild_points_command():
+        """모든 사용자의 포인트를 원장 합계로 재계산"""
+        from points import rebuild_points
+        count = rebuild_points()
+        click.echo(f'Rebuilt points for {count} users.')
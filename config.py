@@ -3,6 +3,11 @@ Application configuration settings
 """
 import os
 from datetime import timedelta
+from dotenv import load_dotenv
+from sqlalchemy.engine import URL, make_url
+
+# 설정 클래스가 환경변수를 읽기 전에 .env 적용
+load_dotenv()
 
 class Config:
     """Base configuration"""
@@ -15,11 +20,27 @@ class Config:
     MYSQL_USER = os.environ.get('MYSQL_USER', 'root')
     MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD', '')
     MYSQL_HOST = os.environ.get('MYSQL_HOST', 'localhost')
+    MYSQL_PORT = int(os.environ.get('MYSQL_PORT', 3306))
     MYSQL_DATABASE = os.environ.get('MYSQL_DATABASE', 'saythat_db')
+    MYSQL_REPLICA_HOST = os.environ.get('MYSQL_REPLICA_HOST', '')  # 읽기 전용 복제 서버 (계정/DB 이름은 원본과 같음)
+    MYSQL_REPLICA_PORT = int(os.environ.get('MYSQL_REPLICA_PORT', MYSQL_PORT))
+    
+    # Read replica settings (복제 서버가 설정된 경우만 사용)
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))      # 쓰기 이후 이 시간 동안 원본에서 읽음
+    REPLICA_MAX_LAG_SECONDS = int(os.environ.get('REPLICA_MAX_LAG_SECONDS', 2))    # 복제 지연이 이보다 크면 원본에서 읽음
+    REPLICA_LAG_CHECK_SECONDS = int(os.environ.get('REPLICA_LAG_CHECK_SECONDS', 5))
     
     # SQLAlchemy settings
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool settings (pool_size/max_overflow/pool_timeout는 SQLite에 적용하지 않음)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 280))  # MySQL wait_timeout보다 짧게
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'True').lower() == 'true'
+    DB_POOL_WARMUP = int(os.environ.get('DB_POOL_WARMUP', 2))      # fork 이후 워커별로 미리 여는 연결 수
+    
     # Session settings
     PERMANENT_SESSION_LIFETIME = timedelta(days=30)
     SESSION_COOKIE_SECURE = os.environ.get('SESSION_COOKIE_SECURE', 'False').lower() == 'true'
@@ -32,12 +53,28 @@ class Config:
     
     # Auto-login settings
     AUTO_LOGIN_TOKEN_EXPIRY_DAYS = 30
+    AUTO_LOGIN_EXTEND_INTERVAL_HOURS = 24   # 만료 시간 연장은 이 간격에 한 번만
+    AUTO_LOGIN_SWEEP_SECONDS = 3600         # 만료 토큰 정리 주기
+    AUTO_LOGIN_SWEEP_BATCH_SIZE = 1000
     
     # Points system
     POINTS_FOR_POST = 10
     POINTS_FOR_COMMENT = 5
     POINTS_FOR_VOTE_RECEIVED = 1
     POINTS_FOR_COMMENT_UPVOTE = 1
+    POINTS_FOR_COMMENT_RECEIVED = 1
+    
+    # Point ledger reason codes
+    POINT_REASONS = {
+        'post': '글 작성',
+        'comment': '댓글 작성',
+        'vote_received': '내 글에 투표',
+        'comment_upvote': '내 댓글에 추천',
+        'comment_received': '내 글에 댓글',
+        'opening_balance': '기존 포인트',
+    }
+    POINT_AGGREGATE_SECONDS = 10      # 포인트 원장 집계 주기
+    POINT_AGGREGATE_BATCH_SIZE = 1000
     
     # Level thresholds (in points)
     LEVEL_THRESHOLDS = {
@@ -57,9 +94,119 @@ class Config:
         'diamond': 16
     }
     
+    # Level display (이름, 아이콘)
+    LEVEL_DISPLAY = {
+        'skull': ('해골', '💀'),
+        'bronze': ('동메달', '🥉'),
+        'silver': ('은메달', '🥈'),
+        'gold': ('금메달', '🥇'),
+        'diamond': ('다이아', '💎')
+    }
+    LEVEL_CACHE_SECONDS = 30          # 요청 간 레벨 정보 캐시 유지 시간
+    LEVEL_CACHE_MAX_ENTRIES = 100000
+    
+    # Email/nick availability filter (회원가입 중복 확인)
+    MEMBERSHIP_ERROR_RATE = 0.01      # 블룸 필터 오탐률 (오탐은 DB로 확인)
+    MEMBERSHIP_MIN_CAPACITY = 100000
+    MEMBERSHIP_LRU_SIZE = 10000       # 최근 DB 확인 결과 캐시 크기
+    MEMBERSHIP_LRU_SECONDS = 60
+    MEMBERSHIP_REFRESH_SECONDS = 5    # 다른 워커에서 가입한 사용자 반영 주기
+    
+    # Stats API (화면의 숫자만 갱신)
+    STATS_MAX_IDS = 200               # 한 번에 조회할 수 있는 토론+댓글 id 수
+    
+    # Leaderboard settings
+    LEADERBOARD_SIZE = 50             # 순위표에 보여줄 상위 사용자 수
+    LEADERBOARD_MAX_SIZE = 100
+    LEADERBOARD_AROUND = 5            # 내 순위 앞뒤로 보여줄 사용자 수
+    LEADERBOARD_REBUILD_SECONDS = 300 # 다른 워커에서 반영된 포인트를 맞추기 위한 재적재 주기
+    
     # UI settings
     BEST_COMMENTS_COUNT = 3
     RECENT_DISCUSSIONS_LIMIT = 5
+    COMMENTS_PAGE_SIZE = 20
+    COMMENTS_MAX_PAGE_SIZE = 100
+    
+    # Feed settings (무한 스크롤)
+    FEED_PAGE_SIZE = 20
+    FEED_MAX_PAGE_SIZE = 50
+    HOT_COMMENT_THRESHOLD = 100    # 댓글 수가 이 이상이면 HOT
+    HOT_VIEW_THRESHOLD = 1000      # 조회수가 이 이상이면 HOT
+    WARM_MIN_VOTES = 20            # 논란중 판단을 위한 최소 투표수
+    WARM_MAX_GAP_PERCENT = 10      # 찬반 차이가 이 이하면 논란중
+    
+    # Trending settings
+    TRENDING_BUCKET_MINUTES = 10   # 활동 카운터 버킷 크기
+    TRENDING_WINDOWS = [           # (key, 표시 이름, 기간(분))
+        ('realtime', '실시간 인기순위', 60),
+        ('today', 'TODAY 인기순위', 24 * 60),
+        ('weekly', '주간 인기순위', 7 * 24 * 60),
+        ('monthly', '월간 인기순위', 30 * 24 * 60),
+    ]
+    TRENDING_LIMIT = 10
+    TRENDING_VOTE_WEIGHT = 3
+    TRENDING_VIEW_WEIGHT = 1
+    TRENDING_CACHE_SECONDS = 30
+    
+    # Fragment cache settings (lru: 프로세스 내, filesystem: 워커 간 공유, null: 비활성화)
+    FRAGMENT_CACHE_BACKEND = os.environ.get('FRAGMENT_CACHE_BACKEND', 'lru')
+    FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL', 60))
+    FRAGMENT_CACHE_MAX_ENTRIES = 5000
+    FRAGMENT_CACHE_DIR = os.environ.get('FRAGMENT_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'instance', 'fragment_cache'))
+    
+    # Metrics (/metrics, Prometheus 형식)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # /metrics 조회에 필요한 Authorization: Bearer 토큰 (없으면 조회 불가)
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+    METRICS_DETECT_N_PLUS_ONE = os.environ.get('METRICS_DETECT_N_PLUS_ONE', 'False').lower() == 'true'  # 디버그 모드에서는 항상 켜짐
+    N_PLUS_ONE_THRESHOLD = 5          # 한 요청에서 같은 SQL이 이 횟수 이상이면 경고
+    
+    # Static assets (flask build-assets로 static/dist에 생성)
+    ASSETS_USE_MANIFEST = os.environ.get('ASSETS_USE_MANIFEST', 'True').lower() == 'true'  # 빌드가 있으면 해시 파일명 사용
+    ASSETS_DIST_DIR = 'dist'
+    ASSETS_HASH_LENGTH = 10
+    ASSETS_MAX_AGE = 365 * 24 * 3600      # 해시 파일명은 내용이 바뀌면 URL도 바뀌므로 1년 캐시
+    
+    # Conditional GET (ETag)
+    RELEASE_VERSION = os.environ.get('RELEASE_VERSION', '')  # 템플릿이 바뀌는 배포마다 바꾸면 캐시된 페이지를 다시 받음
+    
+    # Response compression (HTML/JSON)
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'True').lower() == 'true'
+    COMPRESS_MIN_SIZE = 1024              # 이보다 작은 응답은 압축하지 않음 (바이트)
+    COMPRESS_LEVEL = 6
+    COMPRESS_MIMETYPES = ('text/html', 'application/json')
+    
+    # Live updates (SSE, memory: 개발 서버/워커 1개, redis: 워커 여러 개 또는 여러 노드)
+    LIVE_ENABLED = os.environ.get('LIVE_ENABLED', 'False').lower() == 'true'  # 끄면 30초 주기 폴링
+    LIVE_BACKEND = os.environ.get('LIVE_BACKEND', 'memory')
+    LIVE_REDIS_URL = os.environ.get('LIVE_REDIS_URL', 'redis://localhost:6379/0')
+    LIVE_FLUSH_SECONDS = 1            # 토론별 변화량 전송 주기 (토론당 초당 최대 1회)
+    LIVE_HEARTBEAT_SECONDS = 15
+    LIVE_RETRY_MILLISECONDS = 5000
+    LIVE_MAX_SUBSCRIBERS = int(os.environ.get('LIVE_MAX_SUBSCRIBERS', 5000))  # 워커당 최대 SSE 연결 수 (비동기 워커 기준)
+    LIVE_RESERVED_THREADS = 2         # 스레드 워커에서 SSE가 아닌 요청용으로 남겨 둘 스레드 수
+    LIVE_QUEUE_SIZE = 32              # 연결당 밀린 메시지 허용 수
+    
+    # View counter settings (조회수 지연 저장)
+    VIEW_FLUSH_SECONDS = 5              # 조회 기록 저장 주기
+    VIEW_FLUSH_BATCH_SIZE = 1000        # 대기 중인 기록이 이만큼 쌓이면 바로 저장
+    VIEW_SEEN_MAX_ENTRIES = 1000000     # 메모리 중복 확인 집합의 최대 크기
+    VIEW_RECORD_RETENTION_DAYS = int(os.environ.get('VIEW_RECORD_RETENTION_DAYS', 7))  # 원본 조회 기록 보관 기간
+    VIEW_ROLLUP_BATCH_SIZE = 5000       # 압축 시 한 트랜잭션에서 삭제할 최대 행 수
+    VIEW_ROLLUP_SECONDS = 3600          # 오래된 조회 기록 압축 주기
+    
+    # Search settings
+    SEARCH_NGRAM_SIZE = 2          # 한국어 검색을 위한 문자 n-gram 크기
+    SEARCH_SUBJECT_WEIGHT = 3      # 제목에 나온 토큰의 가중치
+    SEARCH_CONTENT_WEIGHT = 1      # 본문/댓글에 나온 토큰의 가중치
+    SEARCH_MIN_MATCH_RATIO = 0.6   # 검색어 토큰 중 최소 일치 비율
+    SEARCH_PAGE_SIZE = 20
+    SEARCH_MAX_QUERY_LENGTH = 100
+    
+    # Discussion deletion settings (삭제 표시 후 백그라운드에서 나눠서 삭제)
+    DELETION_INTERVAL_SECONDS = 5       # 삭제 작업 실행 주기
+    DELETION_BATCH_SIZE = 500           # 한 트랜잭션에서 삭제할 최대 행 수
+    DELETION_MAX_CHUNKS_PER_RUN = 20    # 한 번 실행할 때 처리할 최대 트랜잭션 수
     
     # Server settings
     HOST = os.environ.get('FLASK_HOST', '0.0.0.0')
@@ -67,23 +214,54 @@ class Config:
     
     @staticmethod
     def get_database_uri():
-        """Get database URI with MySQL fallback to SQLite"""
-        try:
-            import pymysql
-            # Test MySQL connection
-            test_conn = pymysql.connect(
-                host=Config.MYSQL_HOST,
-                user=Config.MYSQL_USER,
-                password=Config.MYSQL_PASSWORD
-            )
-            cursor = test_conn.cursor()
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {Config.MYSQL_DATABASE}")
-            test_conn.close()
-            
-            return f'mysql://{Config.MYSQL_USER}:{Config.MYSQL_PASSWORD}@{Config.MYSQL_HOST}/{Config.MYSQL_DATABASE}'
-        except Exception as e:
-            print(f"MySQL connection failed: {e}. Falling back to SQLite.")
-            return 'sqlite:///saythat.db'
+        """Database URI from DATABASE_URL, otherwise the MySQL settings (no connection is made)
+
+        SQLite is only used when DATABASE_URL names it, so a missing MySQL never silently
+        falls back to a local file database.
+        """
+        if os.environ.get('DATABASE_URL'):
+            return os.environ['DATABASE_URL']
+        return URL.create(
+            'mysql+pymysql',
+            username=Config.MYSQL_USER,
+            password=Config.MYSQL_PASSWORD or None,
+            host=Config.MYSQL_HOST,
+            port=Config.MYSQL_PORT,
+            database=Config.MYSQL_DATABASE,
+            query={'charset': 'utf8mb4'}
+        ).render_as_string(hide_password=False)
+    
+    @staticmethod
+    def get_replica_uri():
+        """Read replica URI from DATABASE_REPLICA_URL or MYSQL_REPLICA_HOST, or None"""
+        if os.environ.get('DATABASE_REPLICA_URL'):
+            return os.environ['DATABASE_REPLICA_URL']
+        if Config.MYSQL_REPLICA_HOST:
+            return URL.create(
+                'mysql+pymysql',
+                username=Config.MYSQL_USER,
+                password=Config.MYSQL_PASSWORD or None,
+                host=Config.MYSQL_REPLICA_HOST,
+                port=Config.MYSQL_REPLICA_PORT,
+                database=Config.MYSQL_DATABASE,
+                query={'charset': 'utf8mb4'}
+            ).render_as_string(hide_password=False)
+        return None
+    
+    @staticmethod
+    def get_engine_options(uri):
+        """SQLAlchemy engine/pool options for the given database URI"""
+        options = {
+            'pool_pre_ping': Config.DB_POOL_PRE_PING,
+            'pool_recycle': Config.DB_POOL_RECYCLE,
+        }
+        if make_url(uri).get_backend_name() != 'sqlite':
+            options.update({
+                'pool_size': Config.DB_POOL_SIZE,
+                'max_overflow': Config.DB_MAX_OVERFLOW,
+                'pool_timeout': Config.DB_POOL_TIMEOUT,
+            })
+        return options
 
 class DevelopmentConfig(Config):
     """Development configuration"""
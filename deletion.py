@@ -0,0 +1,107 @@
+"""
+Discussion deletion - hide at once with a soft-delete flag, then purge dependent rows in bounded chunks
+"""
+import logging
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from models import (db, STContent, STComment, STVoteRecord, STViewRecord, STViewDaily,
+                    STTrendingBucket, STSearchPosting, STDeletionJob)
+from config import Config
+from tasks import PeriodicTask, register_task
+
+logger = logging.getLogger(__name__)
+
+DONE = 'done'
+
+def _rows_of(model):
+    """content_id 컬럼으로 토론에 속한 행 id 조회"""
+    return lambda content_id: db.session.query(model.id).filter(model.content_id == content_id)
+
+def _comment_votes(content_id):
+    return db.session.query(STVoteRecord.id)\
+                     .join(STComment, STComment.id == STVoteRecord.comment_id)\
+                     .filter(STComment.content_id == content_id)
+
+def _discussion(content_id):
+    return db.session.query(STContent.id).filter(STContent.id == content_id)
+
+# 삭제 단계 (이름, 모델, 삭제할 행 id 쿼리) - 참조하는 행부터 지우고 토론 행은 마지막에 삭제
+STAGES = (
+    ('comment_votes', STVoteRecord, _comment_votes),
+    ('comments', STComment, _rows_of(STComment)),
+    ('content_votes', STVoteRecord, _rows_of(STVoteRecord)),
+    ('view_records', STViewRecord, _rows_of(STViewRecord)),
+    ('view_daily', STViewDaily, _rows_of(STViewDaily)),
+    ('trending_buckets', STTrendingBucket, _rows_of(STTrendingBucket)),
+    ('search_postings', STSearchPosting, _rows_of(STSearchPosting)),
+    ('discussion', STContent, _discussion),
+)
+STAGE_NAMES = [name for name, _, _ in STAGES]
+_STAGES_BY_NAME = {name: (model, ids) for name, model, ids in STAGES}
+
+def soft_delete_discussion(discussion):
+    """토론을 삭제 표시하고 삭제 작업 등록 (커밋은 호출자가 담당)"""
+    discussion.is_deleted = True
+    discussion.deleted_at = datetime.utcnow()
+    # 토론 페이지 검증자가 바뀌도록
+    discussion.version = STContent.version + 1
+    db.session.add(STDeletionJob(content_id=discussion.id, stage=STAGE_NAMES[0]))
+
+def _next_stage(stage):
+    index = STAGE_NAMES.index(stage) + 1
+    return STAGE_NAMES[index] if index < len(STAGE_NAMES) else DONE
+
+def run_deletion_jobs(max_chunks=None, batch_size=None):
+    """대기 중인 삭제 작업을 단계별로 나눠서 처리 (삭제한 행 수 반환)
+
+    한 트랜잭션에서 최대 batch_size개씩 지우고 진행 단계를 같은 트랜잭션에 기록하므로,
+    중간에 중단되어도 다음 실행에서 이어서 처리된다. 한 번 실행할 때 최대 max_chunks개의
+    트랜잭션만 처리해서 큰 토론을 지우는 동안에도 다른 쓰기가 오래 기다리지 않는다.
+    """
+    max_chunks = max_chunks or Config.DELETION_MAX_CHUNKS_PER_RUN
+    batch_size = batch_size or Config.DELETION_BATCH_SIZE
+    deleted = 0
+
+    for _ in range(max_chunks):
+        # 동시에 도는 삭제 작업끼리 같은 작업을 진행하지 않도록 잠금
+        job = STDeletionJob.query.filter(STDeletionJob.stage != DONE)\
+                                 .order_by(STDeletionJob.id).with_for_update().first()
+        if job is None:
+            db.session.rollback()
+            break
+
+        model, ids_query = _STAGES_BY_NAME[job.stage]
+        ids = [id for (id,) in ids_query(job.content_id).limit(batch_size)]
+        try:
+            if ids:
+                model.query.filter(model.id.in_(ids)).delete(synchronize_session=False)
+                job.deleted_rows += len(ids)
+            if len(ids) < batch_size:
+                job.stage = _next_stage(job.stage)
+                if job.stage == DONE:
+                    job.finished_at = datetime.utcnow()
+            job.updated_at = datetime.utcnow()
+            db.session.commit()
+        except IntegrityError:
+            # 삭제 도중 늦게 저장된 하위 행(조회/투표 등)이 있음 - 처음 단계부터 다시 정리
+            db.session.rollback()
+            STDeletionJob.query.filter_by(id=job.id)\
+                               .update({STDeletionJob.stage: STAGE_NAMES[0]}, synchronize_session=False)
+            db.session.commit()
+            continue
+
+        deleted += len(ids)
+        if job.stage == DONE:
+            logger.info(f"Finished deleting discussion {job.content_id} ({job.deleted_rows} rows)")
+
+    return deleted
+
+def pending_deletion_jobs():
+    """진행 중인 삭제 작업의 (id, content_id, 단계) 목록"""
+    rows = db.session.query(STDeletionJob.id, STDeletionJob.content_id, STDeletionJob.stage)\
+                     .filter(STDeletionJob.stage != DONE).order_by(STDeletionJob.id)
+    return [tuple(row) for row in rows]
+
+
+deletion_task = register_task(PeriodicTask('discussion-deletion', Config.DELETION_INTERVAL_SECONDS,
+                                           run_deletion_jobs))
@@ -0,0 +1,39 @@
+"""
+Gunicorn settings (gunicorn -c gunicorn.conf.py wsgi:app)
+"""
+import os
+import multiprocessing
+
+bind = os.environ.get('GUNICORN_BIND', f"{os.environ.get('FLASK_HOST', '0.0.0.0')}:{os.environ.get('FLASK_PORT', 5000)}")
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# SSE 연결이 스레드를 붙잡지 않도록 기본은 gevent (gthread는 SSE 연결 수가 스레드 수로 제한됨)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+
+# 워커를 주기적으로 교체해서 메모리 증가를 막음
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = 1000
+
+if worker_class == 'gevent':
+    # preload_app으로 마스터에서 앱을 불러오기 전에 패치해야 모듈 수준의 Lock/Queue도 gevent용이 됨
+    from gevent import monkey
+    monkey.patch_all()
+
+# memory 브로커는 같은 프로세스의 구독자에게만 전달하므로 워커가 여러 개면 실시간 숫자가 어긋남
+from config import Config
+if Config.LIVE_ENABLED and Config.LIVE_BACKEND == 'memory' and workers > 1:
+    raise RuntimeError(f"LIVE_BACKEND=memory only reaches subscribers in one process; "
+                       f"use LIVE_BACKEND=redis or GUNICORN_WORKERS=1 (got {workers} workers)")
+
+# 앱을 마스터에서 한 번만 로드 (SECRET_KEY 기본값 등이 워커마다 달라지지 않음)
+preload_app = True
+
+def post_fork(server, worker):
+    """fork 이후 물려받은 DB 연결을 버리고 워커 전용 커넥션 풀을 미리 채움"""
+    from wsgi import app
+    from app import warm_up_pool
+    from live import limit_subscribers
+    warm_up_pool(app)
+    limit_subscribers(server.cfg.worker_class_str, server.cfg.threads)
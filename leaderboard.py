@@ -0,0 +1,116 @@
+"""
+Points leaderboard - an in-memory ranking kept sorted and updated from point aggregation
+"""
+import threading
+import logging
+from bisect import bisect_left, insort
+from models import db, STLevel, STUser, level_tier
+from config import Config
+from tasks import PeriodicTask, register_task
+
+logger = logging.getLogger(__name__)
+
+class Leaderboard:
+    """포인트 순위표
+
+    (-포인트, user_id) 순으로 정렬된 목록을 유지하므로 순위 조회는 이진 탐색 한 번이다.
+    포인트가 바뀌면 해당 사용자의 항목만 빼고 다시 넣으며, 다른 워커 프로세스에서 반영된
+    포인트는 주기적인 재적재로 맞춘다. 적재는 워커 시작(warm_up_pool)과 주기 작업에서만 하고
+    요청 중에는 하지 않으므로, 적재 전에는 빈 순위표로 응답한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []  # (-point, user_id) 오름차순
+        self._points = {}   # user_id -> point
+        self._loaded = False
+
+    def reset(self):
+        """메모리 상태 초기화 (다음 재적재 때 ST_LEVEL_TB에서 다시 적재)"""
+        with self._lock:
+            self._entries = []
+            self._points = {}
+            self._loaded = False
+
+    def rebuild(self):
+        """ST_LEVEL_TB에서 전체 순위 다시 적재"""
+        points = dict(db.session.query(STLevel.user_id, STLevel.point))
+        entries = sorted((-(point or 0), user_id) for user_id, point in points.items())
+        with self._lock:
+            self._points = {user_id: point or 0 for user_id, point in points.items()}
+            self._entries = entries
+            self._loaded = True
+        return len(entries)
+
+    def apply(self, deltas):
+        """포인트 증감 반영 ({user_id: delta}), 아직 적재 전이면 무시"""
+        with self._lock:
+            if not self._loaded:
+                return
+            for user_id, delta in deltas.items():
+                old = self._points.get(user_id)
+                if old is not None:
+                    index = bisect_left(self._entries, (-old, user_id))
+                    del self._entries[index]
+                new = (old or 0) + delta
+                self._points[user_id] = new
+                insort(self._entries, (-new, user_id))
+
+    def rank(self, user_id):
+        """사용자 순위 (동점자는 같은 순위), 없으면 None"""
+        with self._lock:
+            point = self._points.get(user_id)
+            if point is None:
+                return None
+            return bisect_left(self._entries, (-point,)) + 1
+
+    def _slice(self, start, stop):
+        """[start, stop) 위치의 (순위, user_id, point) 목록"""
+        with self._lock:
+            start = max(start, 0)
+            result = []
+            for key, user_id in self._entries[start:stop]:
+                rank = bisect_left(self._entries, (key,)) + 1
+                result.append((rank, user_id, -key))
+            return result
+
+    def top(self, limit=None):
+        """상위 사용자 목록"""
+        return self._slice(0, limit or Config.LEADERBOARD_SIZE)
+
+    def around(self, user_id, radius=None):
+        """사용자 앞뒤 순위 목록"""
+        radius = radius or Config.LEADERBOARD_AROUND
+        with self._lock:
+            point = self._points.get(user_id)
+            if point is None:
+                return []
+            index = bisect_left(self._entries, (-point, user_id))
+        return self._slice(index - radius, index + radius + 1)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def serialize_ranking(rows):
+    """순위 목록 JSON 변환 (표시되는 사용자 닉네임만 한 번에 조회)"""
+    user_ids = [user_id for _, user_id, _ in rows]
+    nicks = dict(db.session.query(STUser.id, STUser.nick).filter(STUser.id.in_(user_ids))) if user_ids else {}
+    result = []
+    for rank, user_id, point in rows:
+        tier = level_tier(point)
+        result.append({
+            'rank': rank,
+            'user_id': user_id,
+            'nick': nicks.get(user_id, ''),
+            'point': point,
+            'level_icon': tier.icon,
+            'level_name': tier.name
+        })
+    return result
+
+
+leaderboard = Leaderboard()
+
+leaderboard_task = register_task(PeriodicTask('leaderboard-rebuild', Config.LEADERBOARD_REBUILD_SECONDS,
+                                              leaderboard.rebuild))
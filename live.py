@@ -0,0 +1,207 @@
+"""
+Live discussion updates - coalesced counter deltas fanned out to Server-Sent Events subscribers
+"""
+import os
+import json
+import queue
+import logging
+import threading
+from config import Config
+from tasks import PeriodicTask, register_task
+
+logger = logging.getLogger(__name__)
+
+def merge_delta(target, delta):
+    """카운터 변화량 합치기 (댓글별 변화량은 댓글 id 단위로 합침)"""
+    for key, value in delta.items():
+        if isinstance(value, dict):
+            merge_delta(target.setdefault(key, {}), value)
+        else:
+            target[key] = target.get(key, 0) + value
+    return target
+
+
+class Subscription:
+    """SSE 연결 하나의 메시지 대기열"""
+
+    def __init__(self, discussion_id):
+        self.discussion_id = discussion_id
+        self._queue = queue.Queue(maxsize=Config.LIVE_QUEUE_SIZE)
+
+    def put(self, event, data):
+        try:
+            self._queue.put_nowait((event, data))
+        except queue.Full:
+            # 읽지 못하고 밀린 연결은 변화량을 버리고 전체 숫자를 다시 받도록 알림
+            with self._queue.mutex:
+                self._queue.queue.clear()
+            self._queue.put_nowait(('resync', {}))
+
+    def get(self, timeout):
+        """다음 메시지, timeout 동안 없으면 None"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class LiveHub:
+    """토론별 구독자에게 변화량을 모아서 전달하는 허브
+
+    변화량은 바로 보내지 않고 토론별로 합쳐 두었다가 flush 주기마다 한 번씩 보낸다.
+    투표가 몰리는 토론도 구독자당 주기마다 메시지 하나만 받는다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # discussion_id -> set(Subscription)
+        self._pending = {}      # discussion_id -> 합쳐진 변화량
+        self._count = 0
+        self.max_subscribers = Config.LIVE_MAX_SUBSCRIBERS
+
+    def subscribe(self, discussion_id):
+        """구독 시작, 워커당 최대 구독자 수를 넘으면 None"""
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                return None
+            subscription = Subscription(discussion_id)
+            self._subscribers.setdefault(discussion_id, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.discussion_id)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.discussion_id]
+                    self._pending.pop(subscription.discussion_id, None)
+
+    def receive(self, discussion_id, delta):
+        """브로커에서 받은 변화량 적재 (이 워커에 구독자가 없으면 무시)"""
+        with self._lock:
+            if discussion_id not in self._subscribers:
+                return
+            merge_delta(self._pending.setdefault(discussion_id, {}), delta)
+
+    def flush(self):
+        """합쳐진 변화량을 구독자에게 전달"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            targets = [(list(self._subscribers.get(discussion_id, ())), delta)
+                       for discussion_id, delta in pending.items()]
+
+        for subscribers, delta in targets:
+            for subscription in subscribers:
+                subscription.put('stats', delta)
+        return len(targets)
+
+    def __len__(self):
+        return self._count
+
+
+class InProcessBroker:
+    """단일 노드용 브로커 (같은 프로세스의 허브로 바로 전달)"""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def publish(self, discussion_id, delta):
+        self.hub.receive(discussion_id, delta)
+
+    def ensure_started(self):
+        pass
+
+
+class RedisBroker:
+    """여러 노드용 브로커 (Redis pub/sub으로 모든 워커의 허브에 전달)"""
+
+    CHANNEL_PREFIX = 'saythat:live:'
+
+    def __init__(self, hub, url):
+        import redis  # 선택 의존성 - LIVE_BACKEND=redis일 때만 필요
+        self.hub = hub
+        self.client = redis.Redis.from_url(url)
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, discussion_id, delta):
+        try:
+            self.client.publish(f'{self.CHANNEL_PREFIX}{discussion_id}', json.dumps(delta))
+        except Exception as e:
+            logger.error(f"Live publish failed: {str(e)}")
+
+    def ensure_started(self):
+        """현재 프로세스에서 구독 스레드가 없으면 시작"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._listen, name='live-redis', daemon=True).start()
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f'{self.CHANNEL_PREFIX}*')
+        for message in pubsub.listen():
+            try:
+                channel = message['channel'].decode()
+                discussion_id = int(channel[len(self.CHANNEL_PREFIX):])
+                self.hub.receive(discussion_id, json.loads(message['data']))
+            except (ValueError, KeyError) as e:
+                logger.error(f"Invalid live message: {str(e)}")
+
+
+def create_broker(hub, backend=None):
+    """설정에 맞는 브로커 생성"""
+    backend = backend or Config.LIVE_BACKEND
+    if backend == 'memory':
+        return InProcessBroker(hub)
+    if backend == 'redis':
+        return RedisBroker(hub, Config.LIVE_REDIS_URL)
+    raise ValueError(f"Unknown live backend: {backend}")
+
+
+live_hub = LiveHub()
+live_broker = create_broker(live_hub)
+
+ASYNC_WORKER_CLASSES = ('gevent', 'eventlet')
+
+def limit_subscribers(worker_class, threads):
+    """워커가 실제로 붙잡을 수 있는 연결 수로 구독자 수 제한
+
+    스레드 워커는 SSE 연결 하나가 스레드 하나를 계속 차지하므로, 일반 요청용 스레드를
+    LIVE_RESERVED_THREADS개 남기고 나머지만 SSE에 쓴다.
+    """
+    if any(name in worker_class for name in ASYNC_WORKER_CLASSES):
+        live_hub.max_subscribers = Config.LIVE_MAX_SUBSCRIBERS
+    else:
+        live_hub.max_subscribers = min(Config.LIVE_MAX_SUBSCRIBERS,
+                                       max(threads - Config.LIVE_RESERVED_THREADS, 0))
+    return live_hub.max_subscribers
+
+def publish_delta(discussion_id, **delta):
+    """커밋된 변경을 구독자에게 알림 (커밋 이후에 호출, 실시간 갱신이 꺼져 있으면 무시)"""
+    if Config.LIVE_ENABLED:
+        live_broker.publish(discussion_id, delta)
+
+def event_stream(subscription):
+    """SSE 응답 본문 (연결이 끊기면 구독 해제)"""
+    try:
+        yield f'retry: {Config.LIVE_RETRY_MILLISECONDS}\n\n'
+        while True:
+            message = subscription.get(Config.LIVE_HEARTBEAT_SECONDS)
+            if message is None:
+                # 유휴 연결 유지 및 끊긴 연결 감지용
+                yield ': ping\n\n'
+                continue
+            event, data = message
+            yield f'event: {event}\ndata: {json.dumps(data)}\n\n'
+    finally:
+        live_hub.unsubscribe(subscription)
+
+
+live_flush_task = register_task(PeriodicTask('live-flush', Config.LIVE_FLUSH_SECONDS, live_hub.flush))
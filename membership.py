@@ -0,0 +1,127 @@
+"""
+In-memory membership filters for email/nick availability checks
+"""
+import math
+import hashlib
+import threading
+import logging
+from models import db, STUser
+from config import Config
+from cache import LRUCache
+from tasks import PeriodicTask, register_task
+
+logger = logging.getLogger(__name__)
+
+def normalize(value):
+    """MySQL 기본 콜레이션처럼 대소문자/뒤 공백을 무시 (구분하지 않는 쪽이 항상 안전)"""
+    return (value or '').strip().casefold()
+
+
+class BloomFilter:
+    """비트 배열 블룸 필터 - '없음'은 확실하고 '있음'은 오탐 가능"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class MembershipIndex:
+    """사용자 테이블 컬럼 값의 존재 여부 확인
+
+    블룸 필터에 없으면 DB를 조회하지 않고 바로 '사용 가능'으로 답한다. 블룸 필터에 있으면
+    최근 조회 결과(LRU)를 보고, 없을 때만 DB를 조회한다. 다른 워커에서 가입한 사용자는
+    주기적으로 마지막으로 읽은 id 이후만 추가로 읽어서 반영한다.
+    """
+
+    def __init__(self, column):
+        self.column = column
+        self._lock = threading.Lock()
+        self._filter = None
+        self._last_id = 0
+        self._recent = LRUCache(Config.MEMBERSHIP_LRU_SIZE)
+
+    def _new_filter(self, expected):
+        capacity = max(Config.MEMBERSHIP_MIN_CAPACITY, expected * 2)
+        return BloomFilter(capacity, Config.MEMBERSHIP_ERROR_RATE)
+
+    def load(self):
+        """ST_USER_TB 전체를 읽어서 필터 생성"""
+        total = db.session.query(db.func.count(STUser.id)).scalar() or 0
+        bloom = self._new_filter(total)
+        last_id = 0
+        for user_id, value in db.session.query(STUser.id, self.column).yield_per(10000):
+            bloom.add(normalize(value))
+            last_id = max(last_id, user_id)
+        with self._lock:
+            self._filter = bloom
+            self._last_id = last_id
+            self._recent.clear()
+        logger.info(f"Loaded {bloom.count} {self.column.key} values into membership filter")
+
+    def refresh(self):
+        """마지막으로 읽은 이후 가입한 사용자 추가 (용량을 넘으면 다시 생성)"""
+        if self._filter is None:
+            return
+        if self._filter.count >= self._filter.capacity:
+            self.load()
+            return
+        rows = db.session.query(STUser.id, self.column).filter(STUser.id > self._last_id)\
+                         .order_by(STUser.id).all()
+        if not rows:
+            return
+        with self._lock:
+            for user_id, value in rows:
+                self._filter.add(normalize(value))
+                self._last_id = max(self._last_id, user_id)
+            # 최근 조회 결과 중 '사용 가능'이 바뀌었을 수 있음
+            self._recent.clear()
+
+    def add(self, value):
+        """이 워커에서 가입한 사용자 바로 반영"""
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(normalize(value))
+        self._recent.set(value, True, Config.MEMBERSHIP_LRU_SECONDS)
+
+    def exists(self, value):
+        """값이 이미 사용중인지 여부"""
+        if self._filter is None:
+            self.load()
+        if normalize(value) not in self._filter:
+            return False
+
+        # 블룸 필터 양성(오탐 포함)만 최근 조회 결과나 DB로 확인 (DB 콜레이션에 맡기도록 원래 값으로 조회)
+        cached = self._recent.get(value)
+        if cached is not None:
+            return cached
+        found = db.session.query(STUser.id).filter(self.column == value).first() is not None
+        self._recent.set(value, found, Config.MEMBERSHIP_LRU_SECONDS)
+        return found
+
+
+email_index = MembershipIndex(STUser.email)
+nick_index = MembershipIndex(STUser.nick)
+
+def refresh_membership():
+    email_index.refresh()
+    nick_index.refresh()
+
+membership_task = register_task(PeriodicTask('membership-refresh', Config.MEMBERSHIP_REFRESH_SECONDS,
+                                             refresh_membership))
@@ -0,0 +1,214 @@
+"""
+Per-request instrumentation - SQL/commit/ORM load/template counters exposed in Prometheus text format
+"""
+import hmac
+import time
+import logging
+import threading
+from collections import Counter, defaultdict
+from flask import g, request, current_app, has_request_context, before_render_template, template_rendered, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapper
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 요청 처리 시간 히스토그램 구간 (초)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class RequestMetrics:
+    """요청 하나에서 수집한 값"""
+    __slots__ = ('started', 'sql_count', 'sql_time', 'commits', 'rows_loaded',
+                 'template_time', 'template_started', 'statements')
+
+    def __init__(self, detect_n_plus_one=False):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.commits = 0
+        self.rows_loaded = 0
+        self.template_time = 0.0
+        self.template_started = []
+        self.statements = Counter() if detect_n_plus_one else None  # SQL 문장별 실행 횟수
+
+
+class MetricsRegistry:
+    """엔드포인트별 누적 값 (워커 프로세스 단위)"""
+
+    FIELDS = ('sql_count', 'sql_time', 'commits', 'rows_loaded', 'template_time')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = Counter()                      # (endpoint, status) -> count
+        self._durations = defaultdict(float)            # endpoint -> 초 합계
+        self._buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self._totals = defaultdict(Counter)             # endpoint -> FIELDS 합계
+        self._n_plus_one = Counter()                    # endpoint -> 감지 횟수
+
+    def observe(self, endpoint, status, duration, metrics):
+        with self._lock:
+            self._requests[(endpoint, status)] += 1
+            self._durations[endpoint] += duration
+            buckets = self._buckets[endpoint]
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[index] += 1
+            totals = self._totals[endpoint]
+            for field in self.FIELDS:
+                totals[field] += getattr(metrics, field)
+
+    def flag_n_plus_one(self, endpoint):
+        with self._lock:
+            self._n_plus_one[endpoint] += 1
+
+    def render(self):
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            lines.append('# HELP saythat_http_requests_total Requests handled by endpoint and status.')
+            lines.append('# TYPE saythat_http_requests_total counter')
+            for (endpoint, status), count in sorted(self._requests.items()):
+                lines.append(f'saythat_http_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+
+            request_counts = Counter()
+            for (endpoint, _), count in self._requests.items():
+                request_counts[endpoint] += count
+
+            lines.append('# HELP saythat_http_request_duration_seconds Request wall time.')
+            lines.append('# TYPE saythat_http_request_duration_seconds histogram')
+            for endpoint in sorted(self._durations):
+                for bound, count in zip(DURATION_BUCKETS, self._buckets[endpoint]):
+                    lines.append(f'saythat_http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+                lines.append(f'saythat_http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {request_counts[endpoint]}')
+                lines.append(f'saythat_http_request_duration_seconds_sum{{endpoint="{endpoint}"}} {self._durations[endpoint]:.6f}')
+                lines.append(f'saythat_http_request_duration_seconds_count{{endpoint="{endpoint}"}} {request_counts[endpoint]}')
+
+            for field, name, help_text in (
+                ('sql_count', 'saythat_sql_statements_total', 'SQL statements executed.'),
+                ('sql_time', 'saythat_sql_seconds_total', 'Time spent executing SQL.'),
+                ('commits', 'saythat_db_commits_total', 'Database commits.'),
+                ('rows_loaded', 'saythat_orm_rows_loaded_total', 'ORM instances loaded.'),
+                ('template_time', 'saythat_template_render_seconds_total', 'Time spent rendering templates.'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for endpoint in sorted(self._totals):
+                    value = self._totals[endpoint][field]
+                    value = f'{value:.6f}' if isinstance(value, float) else value
+                    lines.append(f'{name}{{endpoint="{endpoint}"}} {value}')
+
+            lines.append('# HELP saythat_n_plus_one_total Requests flagged for repeated identical queries.')
+            lines.append('# TYPE saythat_n_plus_one_total counter')
+            for endpoint, count in sorted(self._n_plus_one.items()):
+                lines.append(f'saythat_n_plus_one_total{{endpoint="{endpoint}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+def current_metrics():
+    """현재 요청의 수집 객체 (요청 밖의 백그라운드 작업이면 None)"""
+    if not has_request_context():
+        return None
+    return g.get('request_metrics')
+
+# SQLAlchemy events
+
+# 시작 시각은 실행 컨텍스트에 저장 (문장이 실패하면 컨텍스트와 함께 버려짐)
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.metrics_query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'metrics_query_started', None)
+    metrics = current_metrics()
+    if metrics is not None and started is not None:
+        metrics.sql_count += 1
+        metrics.sql_time += time.perf_counter() - started
+        if metrics.statements is not None:
+            metrics.statements[statement] += 1
+
+def _on_commit(conn):
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.commits += 1
+
+def _on_load(target, context):
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.rows_loaded += 1
+
+# Template signals
+
+def _before_render(sender, template, context, **extra):
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.template_started.append(time.perf_counter())
+
+def _after_render(sender, template, context, **extra):
+    metrics = current_metrics()
+    if metrics is not None and metrics.template_started:
+        metrics.template_time += time.perf_counter() - metrics.template_started.pop()
+
+_installed = False
+
+def _install_listeners():
+    """엔진/매퍼 이벤트는 클래스 단위로 한 번만 등록"""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'commit', _on_commit)
+    event.listen(Mapper, 'load', _on_load)
+    _installed = True
+
+# Flask hooks
+
+def _start_request():
+    g.request_metrics = RequestMetrics(Config.METRICS_DETECT_N_PLUS_ONE or current_app.debug)
+
+def _finish_request(response):
+    metrics = g.pop('request_metrics', None)
+    if metrics is None:
+        return response
+
+    endpoint = request.endpoint or 'unknown'
+    duration = time.perf_counter() - metrics.started
+    registry.observe(endpoint, response.status_code, duration, metrics)
+
+    if duration * 1000 >= Config.SLOW_REQUEST_MS:
+        logger.warning(f"Slow request {request.method} {request.path} ({endpoint}): "
+                       f"{duration * 1000:.0f}ms, {metrics.sql_count} queries "
+                       f"({metrics.sql_time * 1000:.0f}ms), {metrics.commits} commits, "
+                       f"{metrics.rows_loaded} rows, template {metrics.template_time * 1000:.0f}ms")
+
+    # 같은 SQL이 한 요청에서 반복되면 N+1 의심 (지연 로딩 등)
+    repeated = [(statement, count) for statement, count in (metrics.statements or {}).items()
+                if count >= Config.N_PLUS_ONE_THRESHOLD]
+    if repeated:
+        registry.flag_n_plus_one(endpoint)
+        for statement, count in repeated:
+            logger.warning(f"Possible N+1 in {endpoint}: {count}x {' '.join(statement.split())[:300]}")
+
+    return response
+
+def metrics_view():
+    """Prometheus 수집 엔드포인트 (METRICS_TOKEN을 설정하지 않으면 항상 거부)"""
+    authorization = request.headers.get('Authorization', '')
+    if not Config.METRICS_TOKEN or not hmac.compare_digest(authorization, f'Bearer {Config.METRICS_TOKEN}'):
+        return Response('Forbidden\n', status=403, mimetype='text/plain')
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+def init_metrics(app):
+    """요청별 계측 설정"""
+    if not Config.METRICS_ENABLED:
+        return
+
+    _install_listeners()
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
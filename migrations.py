@@ -0,0 +1,125 @@
+"""
+Schema migrations - bring databases created by older versions up to the current models (flask migrate-schema)
+"""
+import logging
+from sqlalchemy import inspect, update, select, func, MetaData, Table
+from sqlalchemy.schema import CreateColumn
+from models import db, STContent, STComment, STAutoLogin, STViewRecord
+from auto_login import hash_token
+
+logger = logging.getLogger(__name__)
+
+def _column_names(connection, table):
+    return {column['name'] for column in inspect(connection).get_columns(table)}
+
+def _indexed_columns(connection, table):
+    """테이블에 이미 있는 인덱스/유니크 제약조건의 컬럼 목록"""
+    inspector = inspect(connection)
+    indexed = {tuple(index['column_names']) for index in inspector.get_indexes(table)}
+    indexed |= {tuple(unique['column_names']) for unique in inspector.get_unique_constraints(table)}
+    return indexed
+
+def add_column(model, name, backfill=None):
+    """컬럼 추가 단계 (없을 때만 추가하고, 추가한 경우 backfill로 기존 행의 값을 채움)"""
+    table = model.__table__
+    column = table.c[name]
+
+    def step(connection):
+        if name in _column_names(connection, table.name):
+            return None
+        ddl = CreateColumn(column).compile(dialect=connection.dialect)
+        connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {ddl}')
+        if backfill:
+            backfill(connection)
+        return f'Added column {table.name}.{name}'
+    return step
+
+def add_index(model, *columns):
+    """모델에 정의된 인덱스 생성 단계 (같은 컬럼의 인덱스가 없을 때만)"""
+    table = model.__table__
+    index = next(index for index in table.indexes
+                 if tuple(column.name for column in index.columns) == columns)
+
+    def step(connection):
+        if columns in _indexed_columns(connection, table.name):
+            return None
+        index.create(connection)
+        return f'Created index on {table.name}({", ".join(columns)})'
+    return step
+
+def backfill_comment_count(connection):
+    """토론별 댓글 수를 댓글 테이블에서 다시 계산"""
+    counts = select(func.count(STComment.id)).where(STComment.content_id == STContent.id).scalar_subquery()
+    connection.execute(update(STContent).values(comment_count=counts))
+
+def backfill_comment_score(connection):
+    """댓글 점수를 추천/비추천 수로 다시 계산"""
+    connection.execute(update(STComment).values(
+        score=func.coalesce(STComment.vote_plus, 0) - func.coalesce(STComment.vote_minus, 0)))
+
+def migrate_auto_login_tokens(connection, batch_size=1000):
+    """원문 토큰을 저장하던 ST_AUTO_LOGIN_TB를 해시 저장 구조로 변경
+
+    사용자당 만료가 가장 늦은 토큰 하나만 남기고 원문은 SHA-256 해시로 바꾼다. SQLite는
+    유니크 컬럼을 삭제할 수 없으므로 기존 테이블 이름을 바꾸고 새 테이블로 옮긴다.
+    """
+    table = STAutoLogin.__table__
+    old_name = 'ST_AUTO_LOGIN_OLD_TB'
+    if old_name not in inspect(connection).get_table_names():
+        if 'token' not in _column_names(connection, table.name):
+            return None
+        connection.exec_driver_sql(f'ALTER TABLE {table.name} RENAME TO {old_name}')
+        table.create(connection)
+    else:
+        # 이전 실행이 옮기는 도중 멈춤 (MySQL은 DDL마다 커밋됨) - 처음부터 다시 옮김
+        connection.execute(table.delete())
+
+    old = Table(old_name, MetaData(), autoload_with=connection)
+    rows = connection.execute(select(old.c.user_id, old.c.token, old.c.expiry, old.c.created_at)
+                              .order_by(old.c.user_id, old.c.expiry.desc()))
+    seen = set()
+    batch = []
+    migrated = 0
+    for row in rows:
+        if row.user_id in seen:
+            continue
+        seen.add(row.user_id)
+        batch.append({'user_id': row.user_id, 'token_hash': hash_token(row.token),
+                      'expiry': row.expiry, 'created_at': row.created_at})
+        if len(batch) >= batch_size:
+            connection.execute(table.insert(), batch)
+            migrated += len(batch)
+            batch = []
+    if batch:
+        connection.execute(table.insert(), batch)
+        migrated += len(batch)
+
+    old.drop(connection)
+    return f'Hashed {migrated} auto-login tokens into {table.name} (one per user)'
+
+
+# 적용 순서대로 (각 단계는 이미 적용되어 있으면 건너뜀)
+MIGRATIONS = [
+    add_column(STContent, 'comment_count', backfill_comment_count),
+    add_column(STComment, 'score', backfill_comment_score),
+    add_index(STComment, 'content_id', 'insert_time'),
+    add_index(STComment, 'content_id', 'score', 'insert_time'),
+    add_column(STContent, 'is_deleted'),
+    add_column(STContent, 'deleted_at'),
+    add_column(STContent, 'version'),
+    migrate_auto_login_tokens,
+    add_index(STViewRecord, 'view_date', 'id'),
+]
+
+def migrate_schema():
+    """없는 테이블 생성 후 기존 테이블에 빠진 컬럼/인덱스 추가 (적용한 단계 설명 목록 반환)"""
+    db.create_all()
+    applied = []
+    for step in MIGRATIONS:
+        # MySQL의 DDL은 바로 커밋되므로 단계마다 별도 트랜잭션
+        with db.engine.begin() as connection:
+            description = step(connection)
+        if description:
+            logger.info(description)
+            applied.append(description)
+    return applied
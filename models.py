@@ -1,9 +1,26 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from bisect import bisect_right
+from collections import namedtuple
 import hashlib
 from config import Config
+from replica import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+LevelTier = namedtuple('LevelTier', ['name', 'icon', 'power'])
+
+# 레벨 기준 포인트 오름차순 테이블 (기준값 목록과 등급을 미리 계산)
+_LEVEL_TABLE = sorted(
+    (threshold, LevelTier(*Config.LEVEL_DISPLAY[key], Config.VOTING_POWER[key]))
+    for key, threshold in Config.LEVEL_THRESHOLDS.items()
+)
+_LEVEL_BOUNDS = [threshold for threshold, _ in _LEVEL_TABLE]
+
+def level_tier(point):
+    """포인트에 해당하는 레벨 등급 (이름, 아이콘, 투표 가중치)"""
+    index = bisect_right(_LEVEL_BOUNDS, point or 0) - 1
+    return _LEVEL_TABLE[max(index, 0)][1]
 
 class STContent(db.Model):
     __tablename__ = 'ST_CONTENT_TB'
@@ -15,7 +32,11 @@ class STContent(db.Model):
     chan = db.Column(db.Integer, default=0)
     ban = db.Column(db.Integer, default=0)
     view_count = db.Column(db.Integer, default=0)
+    comment_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # 댓글 수 (비정규화)
     insert_time = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    version = db.Column(db.Integer, default=1, server_default='1', nullable=False)  # 토론 페이지 내용이 바뀔 때마다 증가 (ETag)
+    is_deleted = db.Column(db.Boolean, default=False, server_default='0', nullable=False)  # 삭제 표시 (하위 행은 백그라운드에서 삭제)
+    deleted_at = db.Column(db.DateTime, nullable=True)
     comments = db.relationship('STComment', backref='discussion', lazy=True)
     author = db.relationship('STUser', backref='discussions', lazy=True, foreign_keys='[STContent.user_id]')
 
@@ -29,8 +50,15 @@ class STComment(db.Model):
     chanban = db.Column(db.Integer, default=0)  # 0: 반대, 1: 찬성
     vote_plus = db.Column(db.Integer, default=0)
     vote_minus = db.Column(db.Integer, default=0)
+    score = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # vote_plus - vote_minus
     insert_time = db.Column(db.DateTime, default=datetime.utcnow)
     author = db.relationship('STUser', backref='comments', lazy=True, foreign_keys='[STComment.user_id]')
+    
+    # 추천순/최신순 댓글 페이지 조회용
+    __table_args__ = (
+        db.Index('ix_comment_content_score_time', 'content_id', 'score', 'insert_time'),
+        db.Index('ix_comment_content_time', 'content_id', 'insert_time'),
+    )
 
 class STUser(db.Model):
     __tablename__ = 'ST_USER_TB'
@@ -56,57 +84,45 @@ class STLevel(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('ST_USER_TB.id'), unique=True, nullable=False)
     point = db.Column(db.Integer, default=0)
     
+    @property
+    def tier(self):
+        return level_tier(self.point)
+    
     @property
     def level_name(self):
-        thresholds = Config.LEVEL_THRESHOLDS
-        if self.point < thresholds['bronze']:
-            return "해골"
-        elif self.point < thresholds['silver']:
-            return "동메달"
-        elif self.point < thresholds['gold']:
-            return "은메달"
-        elif self.point < thresholds['diamond']:
-            return "금메달"
-        else:
-            return "다이아"
+        return self.tier.name
     
     @property
     def level_icon(self):
-        thresholds = Config.LEVEL_THRESHOLDS
-        if self.point < thresholds['bronze']:
-            return "💀"
-        elif self.point < thresholds['silver']:
-            return "🥉"
-        elif self.point < thresholds['gold']:
-            return "🥈"
-        elif self.point < thresholds['diamond']:
-            return "🥇"
-        else:
-            return "💎"
+        return self.tier.icon
     
     @property
     def voting_power(self):
         """레벨에 따른 투표 가중치"""
-        thresholds = Config.LEVEL_THRESHOLDS
-        power = Config.VOTING_POWER
-        if self.point < thresholds['bronze']:
-            return power['skull']
-        elif self.point < thresholds['silver']:
-            return power['bronze']
-        elif self.point < thresholds['gold']:
-            return power['silver']
-        elif self.point < thresholds['diamond']:
-            return power['gold']
-        else:
-            return power['diamond']
+        return self.tier.power
+
+class STPointLedger(db.Model):
+    __tablename__ = 'ST_POINT_LEDGER_TB'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('ST_USER_TB.id'), nullable=False, index=True)
+    points = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(30), nullable=False)  # Config.POINT_REASONS의 코드
+    applied = db.Column(db.Boolean, default=False, nullable=False)  # ST_LEVEL_TB에 반영 여부
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # 미반영 항목을 순서대로 읽기 위한 인덱스
+    __table_args__ = (
+        db.Index('ix_point_ledger_applied_id', 'applied', 'id'),
+    )
 
 class STAutoLogin(db.Model):
     __tablename__ = 'ST_AUTO_LOGIN_TB'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('ST_USER_TB.id'), nullable=False)
-    token = db.Column(db.String(200), unique=True, nullable=False)
-    expiry = db.Column(db.DateTime, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('ST_USER_TB.id'), unique=True, nullable=False)  # 사용자당 토큰 1개
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)  # SHA-256 (원문 토큰은 저장하지 않음)
+    expiry = db.Column(db.DateTime, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user = db.relationship('STUser', backref='auto_login_tokens', lazy=True)
 
@@ -143,4 +159,56 @@ class STViewRecord(db.Model):
     __table_args__ = (
         db.UniqueConstraint('user_id', 'content_id', 'view_date', name='unique_user_content_view_date'),
         db.UniqueConstraint('session_id', 'content_id', 'view_date', name='unique_session_content_view_date'),
-    )
\ No newline at end of file
+        db.Index('ix_view_record_date_id', 'view_date', 'id'),  # 날짜별 압축 배치 조회용
+    )
+
+class STViewDaily(db.Model):
+    __tablename__ = 'ST_VIEW_DAILY_TB'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    content_id = db.Column(db.Integer, db.ForeignKey('ST_CONTENT_TB.id'), nullable=False)
+    view_date = db.Column(db.Date, nullable=False)
+    view_count = db.Column(db.Integer, default=0, nullable=False)  # 해당 날짜의 고유 조회자 수
+    
+    # 오래된 조회 기록을 토론별/날짜별로 압축한 집계
+    __table_args__ = (
+        db.UniqueConstraint('content_id', 'view_date', name='unique_content_view_daily'),
+    )
+
+class STTrendingBucket(db.Model):
+    __tablename__ = 'ST_TRENDING_BUCKET_TB'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    content_id = db.Column(db.Integer, db.ForeignKey('ST_CONTENT_TB.id'), nullable=False)
+    bucket_time = db.Column(db.DateTime, nullable=False, index=True)  # 버킷 시작 시각
+    vote_count = db.Column(db.Integer, default=0, nullable=False)
+    view_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    # 토론별 시간 버킷은 하나만 존재
+    __table_args__ = (
+        db.UniqueConstraint('content_id', 'bucket_time', name='unique_content_bucket'),
+    )
+
+class STSearchPosting(db.Model):
+    __tablename__ = 'ST_SEARCH_POSTING_TB'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    token = db.Column(db.String(16), nullable=False)  # 문자 n-gram
+    content_id = db.Column(db.Integer, db.ForeignKey('ST_CONTENT_TB.id'), nullable=False, index=True)
+    weight = db.Column(db.Integer, default=0, nullable=False)  # 필드 가중치를 반영한 출현 빈도
+    
+    # 토큰별 토론 목록 조회는 이 제약조건의 인덱스를 사용
+    __table_args__ = (
+        db.UniqueConstraint('token', 'content_id', name='unique_token_content'),
+    )
+
+class STDeletionJob(db.Model):
+    __tablename__ = 'ST_DELETION_JOB_TB'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    content_id = db.Column(db.Integer, unique=True, nullable=False)  # 토론 행보다 오래 남으므로 FK 없음
+    stage = db.Column(db.String(30), nullable=False, index=True)  # deletion.STAGES의 단계 이름 또는 'done'
+    deleted_rows = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
@@ -0,0 +1,93 @@
+"""
+Point ledger aggregation - folds ST_POINT_LEDGER_TB entries into ST_LEVEL_TB in batches
+"""
+import logging
+from collections import Counter
+from models import db, STLevel, STPointLedger
+from config import Config
+from tasks import PeriodicTask, register_task
+from utils import upsert_increment_many, invalidate_level_info
+from leaderboard import leaderboard
+
+logger = logging.getLogger(__name__)
+
+def aggregate_points(batch_size=None):
+    """미반영 원장 항목을 사용자별로 합산해서 ST_LEVEL_TB에 반영"""
+    batch_size = batch_size or Config.POINT_AGGREGATE_BATCH_SIZE
+    applied = 0
+    
+    while True:
+        # 동시에 도는 집계 작업끼리 같은 항목을 반영하지 않도록 잠금
+        entries = db.session.query(STPointLedger.id, STPointLedger.user_id, STPointLedger.points)\
+                            .filter(STPointLedger.applied.is_(False))\
+                            .order_by(STPointLedger.id).limit(batch_size)\
+                            .with_for_update().all()
+        if not entries:
+            db.session.rollback()
+            break
+        
+        totals = Counter()
+        for _, user_id, points in entries:
+            totals[user_id] += points
+        
+        upsert_increment_many(STLevel, ['user_id'], [
+            {'user_id': user_id, 'point': total} for user_id, total in totals.items()
+        ])
+        STPointLedger.query.filter(STPointLedger.id.in_([entry.id for entry in entries]))\
+                           .update({STPointLedger.applied: True}, synchronize_session=False)
+        db.session.commit()
+        invalidate_level_info(*totals)
+        leaderboard.apply(totals)
+        applied += len(entries)
+        
+        if len(entries) < batch_size:
+            break
+    
+    if applied:
+        logger.info(f"Applied {applied} point ledger entries")
+    return applied
+
+def seed_point_ledger():
+    """원장 도입 이전 포인트를 기존 포인트 항목으로 기록 (반영된 원장 합계와 현재 포인트의 차이)
+
+    현재 포인트에는 아직 반영되지 않은 항목이 들어 있지 않으므로 반영된 항목만 합산한다.
+    """
+    ledger_totals = dict(db.session.query(STPointLedger.user_id, db.func.sum(STPointLedger.points))
+                                   .filter(STPointLedger.applied.is_(True))
+                                   .group_by(STPointLedger.user_id).all())
+    seeded = 0
+    for user_id, point in db.session.query(STLevel.user_id, STLevel.point).yield_per(10000):
+        difference = (point or 0) - (ledger_totals.get(user_id) or 0)
+        if difference:
+            db.session.add(STPointLedger(user_id=user_id, points=difference,
+                                         reason='opening_balance', applied=True))
+            seeded += 1
+    db.session.commit()
+    return seeded
+
+def rebuild_points():
+    """모든 사용자의 포인트를 원장 합계로 다시 계산 (집계 작업을 멈춘 상태에서 실행)"""
+    STPointLedger.query.filter(STPointLedger.applied.is_(False))\
+                       .update({STPointLedger.applied: True}, synchronize_session=False)
+    
+    ledger_total = db.session.query(db.func.coalesce(db.func.sum(STPointLedger.points), 0))\
+                             .filter(STPointLedger.user_id == STLevel.user_id)\
+                             .scalar_subquery()
+    STLevel.query.update({STLevel.point: ledger_total}, synchronize_session=False)
+    
+    # 원장에는 있지만 레벨 행이 없는 사용자
+    missing = db.session.query(STPointLedger.user_id, db.func.sum(STPointLedger.points))\
+                        .outerjoin(STLevel, STLevel.user_id == STPointLedger.user_id)\
+                        .filter(STLevel.id.is_(None))\
+                        .group_by(STPointLedger.user_id).all()
+    for user_id, total in missing:
+        db.session.add(STLevel(user_id=user_id, point=total))
+    
+    db.session.commit()
+    invalidate_level_info()
+    leaderboard.reset()
+    return db.session.query(db.func.count(STLevel.id)).scalar()
+
+
+point_aggregate_task = register_task(PeriodicTask('point-aggregate', Config.POINT_AGGREGATE_SECONDS,
+                                                  aggregate_points, run_at_exit=True))
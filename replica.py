@@ -0,0 +1,131 @@
+"""
+Read replica routing - SELECTs of read-only requests go to the replica bind unless the viewer just wrote or it lags
+"""
+import time
+import logging
+import threading
+from flask import g, request, session, current_app, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND = 'replica'
+
+def read_only(f):
+    """GET이 아니어도 조회만 하는 라우트 표시 (복제 서버에서 읽음)"""
+    f.read_only = True
+    return f
+
+
+class RoutingSession(Session):
+    """읽기 전용 요청의 SELECT를 복제 서버로 보내는 세션
+
+    쓰기(플러시, INSERT/UPDATE/DELETE, FOR UPDATE 조회)는 항상 원본으로 보내고, 한 번 쓰기가
+    있었던 요청은 이후 조회도 원본에서 해서 같은 요청 안에서 쓴 내용을 읽을 수 있게 한다.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and g.get('db_use_replica'):
+            if not self._flushing and isinstance(clause, Select) and clause._for_update_arg is None:
+                return self._db.engines[REPLICA_BIND]
+            # 이 요청의 나머지 조회는 원본에서
+            g.db_use_replica = False
+            g.db_wrote = True
+        elif has_request_context() and (self._flushing or not isinstance(clause, Select)):
+            g.db_wrote = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaMonitor:
+    """복제 지연 확인 결과 (워커 프로세스 단위로 REPLICA_LAG_CHECK_SECONDS 동안 캐시)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lag = None
+        self.healthy = False
+        self.checked_at = None
+
+    def is_healthy(self):
+        """캐시된 결과, 오래됐으면 한 스레드만 다시 확인하고 나머지는 이전 결과 사용"""
+        stale = self.checked_at is None or \
+            time.monotonic() - self.checked_at >= Config.REPLICA_LAG_CHECK_SECONDS
+        if stale and self._lock.acquire(blocking=False):
+            try:
+                self.check()
+            finally:
+                self._lock.release()
+        return self.healthy
+
+    def check(self):
+        """복제 서버 지연 시간 확인 (실패하면 원본에서 읽도록 표시)"""
+        engine = current_app.extensions['sqlalchemy'].engines.get(REPLICA_BIND)
+        if engine is None:
+            return None
+        try:
+            with engine.connect() as connection:
+                lag = _replication_lag(connection)
+        except Exception as e:
+            logger.warning(f"Replica check failed: {str(e)}")
+            lag = None
+
+        was_healthy = self.healthy
+        self.lag = lag
+        self.healthy = lag is not None and lag <= Config.REPLICA_MAX_LAG_SECONDS
+        self.checked_at = time.monotonic()
+        if was_healthy and not self.healthy:
+            logger.warning(f"Replica lag {lag}s, reading from primary")
+        return lag
+
+
+def _replication_lag(connection):
+    """복제 지연 (초), 복제가 멈췄으면 None
+
+    MySQL은 복제 상태의 지연 시간을 쓰고, 복제 설정이 없는 서버(로컬 시험용)와 그 외 DB는
+    연결만 확인하고 지연 0으로 본다.
+    """
+    if connection.dialect.name != 'mysql':
+        connection.exec_driver_sql('SELECT 1')
+        return 0
+    try:
+        status = connection.exec_driver_sql('SHOW REPLICA STATUS').mappings().first()
+    except Exception:
+        # MySQL 8.0.22 이전 / MariaDB
+        status = connection.exec_driver_sql('SHOW SLAVE STATUS').mappings().first()
+    if status is None:
+        return 0
+    lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+    return None if lag is None else int(lag)
+
+
+replica_monitor = ReplicaMonitor()
+
+def _choose_route():
+    """요청 시작 시 복제 서버에서 읽을지 결정"""
+    g.db_use_replica = False
+    if REPLICA_BIND not in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+
+    view = current_app.view_functions.get(request.endpoint)
+    if request.method not in ('GET', 'HEAD') and not getattr(view, 'read_only', False):
+        return
+    # 최근에 쓰기를 한 사용자는 자신이 쓴 내용을 읽도록 원본 사용
+    if session.get('db_primary_until', 0) > time.time():
+        return
+    g.db_use_replica = replica_monitor.is_healthy()
+
+def _mark_sticky(response):
+    """쓰기가 있었던 요청이면 잠시 원본에서 읽도록 표시"""
+    if g.pop('db_wrote', False) and REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        session['db_primary_until'] = int(time.time()) + Config.REPLICA_STICKY_SECONDS
+    return response
+
+def init_replica(app):
+    """복제 서버 bind와 요청별 라우팅 설정 (복제 서버 설정이 없으면 아무것도 하지 않음)"""
+    uri = Config.get_replica_uri()
+    if not uri:
+        return
+    app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: {'url': uri, **Config.get_engine_options(uri)}}
+    app.before_request(_choose_route)
+    app.after_request(_mark_sticky)
@@ -0,0 +1,137 @@
+"""
+Full-text search - character n-gram inverted index over discussions and comments
+"""
+import re
+import html
+import math
+import logging
+from collections import Counter
+from sqlalchemy.orm import joinedload
+from models import db, STContent, STComment, STSearchPosting
+from config import Config
+from utils import upsert_increment_many
+
+logger = logging.getLogger(__name__)
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_WORD_RE = re.compile(r'[^\W_]+')
+
+def tokenize(text):
+    """텍스트를 문자 n-gram 토큰으로 분리 (HTML 태그 제거, 소문자화)"""
+    text = html.unescape(_TAG_RE.sub(' ', text or '')).lower()
+    size = Config.SEARCH_NGRAM_SIZE
+    tokens = Counter()
+    for word in _WORD_RE.findall(text):
+        if len(word) <= size:
+            tokens[word] += 1
+            continue
+        for i in range(len(word) - size + 1):
+            tokens[word[i:i + size]] += 1
+    return tokens
+
+def _document_tokens(subject='', content=''):
+    """토론 제목/본문의 가중치 반영 토큰"""
+    tokens = Counter()
+    for token, count in tokenize(subject).items():
+        tokens[token] += count * Config.SEARCH_SUBJECT_WEIGHT
+    for token, count in tokenize(content).items():
+        tokens[token] += count * Config.SEARCH_CONTENT_WEIGHT
+    return tokens
+
+def _apply(content_id, tokens, sign=1):
+    """토큰 가중치를 색인에 더하거나 빼기 (커밋은 호출자가 담당)"""
+    upsert_increment_many(STSearchPosting, ['token', 'content_id'], [
+        {'token': token, 'content_id': content_id, 'weight': sign * weight}
+        for token, weight in tokens.items()
+    ])
+    if sign < 0:
+        STSearchPosting.query.filter(STSearchPosting.content_id == content_id,
+                                     STSearchPosting.weight <= 0)\
+                             .delete(synchronize_session=False)
+
+def index_discussion(content_id, subject, content):
+    """새 토론 색인"""
+    _apply(content_id, _document_tokens(subject, content))
+
+def reindex_discussion(content_id, old_subject, old_content, subject, content):
+    """수정된 토론의 제목/본문 색인 갱신 (댓글 색인은 유지)"""
+    delta = _document_tokens(subject, content)
+    delta.subtract(_document_tokens(old_subject, old_content))
+    added = Counter({token: weight for token, weight in delta.items() if weight > 0})
+    removed = Counter({token: -weight for token, weight in delta.items() if weight < 0})
+    if added:
+        _apply(content_id, added)
+    if removed:
+        _apply(content_id, removed, sign=-1)
+
+def index_comment(content_id, text):
+    """댓글 내용을 해당 토론의 색인에 추가"""
+    tokens = Counter({token: count * Config.SEARCH_CONTENT_WEIGHT
+                      for token, count in tokenize(text).items()})
+    _apply(content_id, tokens)
+
+def remove_discussion(content_id):
+    """토론의 색인 전체 삭제"""
+    STSearchPosting.query.filter_by(content_id=content_id).delete(synchronize_session=False)
+
+def search_discussions(query, page=1, page_size=None):
+    """검색어와 일치하는 토론을 순위순으로 반환 (토론 목록, 다음 페이지 여부)"""
+    page_size = page_size or Config.SEARCH_PAGE_SIZE
+    tokens = list(tokenize(query[:Config.SEARCH_MAX_QUERY_LENGTH]))
+    if not tokens:
+        return [], False
+    
+    # 일치한 토큰 수가 많을수록, 그다음 가중치 합이 클수록 상위
+    matched = db.func.count(STSearchPosting.id).label('matched')
+    score = db.func.sum(STSearchPosting.weight).label('score')
+    min_match = max(1, math.ceil(len(tokens) * Config.SEARCH_MIN_MATCH_RATIO))
+    rows = db.session.query(STSearchPosting.content_id, matched, score)\
+                     .filter(STSearchPosting.token.in_(tokens))\
+                     .group_by(STSearchPosting.content_id)\
+                     .having(matched >= min_match)\
+                     .order_by(matched.desc(), score.desc(), STSearchPosting.content_id.desc())\
+                     .offset((page - 1) * page_size).limit(page_size + 1).all()
+    
+    has_more = len(rows) > page_size
+    content_ids = [row.content_id for row in rows[:page_size]]
+    if not content_ids:
+        return [], False
+    
+    discussions = {d.id: d for d in STContent.query.options(joinedload(STContent.author))
+                                                   .filter(STContent.id.in_(content_ids),
+                                                           STContent.is_deleted.is_(False)).all()}
+    return [discussions[i] for i in content_ids if i in discussions], has_more
+
+def rebuild_search_index(batch_size=500):
+    """DB의 모든 토론과 댓글로 색인을 다시 생성 (오프라인 작업)"""
+    STSearchPosting.query.delete(synchronize_session=False)
+    db.session.commit()
+    
+    indexed = 0
+    last_id = 0
+    while True:
+        discussions = db.session.query(STContent.id, STContent.subject, STContent.content)\
+                                .filter(STContent.id > last_id, STContent.is_deleted.is_(False))\
+                                .order_by(STContent.id).limit(batch_size).all()
+        if not discussions:
+            break
+        
+        tokens = {d.id: _document_tokens(d.subject, d.content) for d in discussions}
+        comments = db.session.query(STComment.content_id, STComment.content)\
+                             .filter(STComment.content_id.in_(list(tokens)))
+        for content_id, text in comments.yield_per(1000):
+            for token, count in tokenize(text).items():
+                tokens[content_id][token] += count * Config.SEARCH_CONTENT_WEIGHT
+        
+        db.session.bulk_insert_mappings(STSearchPosting, [
+            {'token': token, 'content_id': content_id, 'weight': weight}
+            for content_id, counter in tokens.items()
+            for token, weight in counter.items()
+        ])
+        db.session.commit()
+        
+        indexed += len(discussions)
+        last_id = discussions[-1].id
+    
+    logger.info(f"Rebuilt search index for {indexed} discussions")
+    return indexed
@@ -1,6 +1,8 @@
-let currentPage = 1;
+let nextCursor = null;
 let isLoading = false;
 let hasMoreData = true;
+let searchQuery = null;
+let searchPage = 1;
 let currentTrendingPeriod = 0;
 
 const trendingPeriods = ['실시간 인기순위', 'TODAY 인기순위', '주간 인기순위', '월간 인기순위'];
@@ -8,6 +10,15 @@ const trendingPeriods = ['실시간 인기순위', 'TODAY 인기순위', '주간
 // 트렌딩 데이터는 API에서 받아옴
 let trendingData = {};
 
+function escapeHtml(text) {
+    return String(text)
+        .replace(/&/g, '&amp;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;')
+        .replace(/"/g, '&quot;')
+        .replace(/'/g, '&#39;');
+}
+
 function formatNumber(num) {
     if (num >= 1000) {
         return (num / 1000).toFixed(1) + 'K';
@@ -15,22 +26,37 @@ function formatNumber(num) {
     return num.toString();
 }
 
+async function fetchTrendingData() {
+    try {
+        const response = await fetch('/api/trending');
+        const result = await response.json();
+        
+        if (result.success) {
+            trendingData = result.trending;
+            loadTrendingTopics();
+        }
+    } catch (error) {
+        console.error(error);
+    }
+}
+
 function loadTrendingTopics() {
-    // TODO: API에서 트렌딩 데이터 로드
     const period = trendingPeriods[currentTrendingPeriod];
     const topics = trendingData[period] || [];
     const trendingList = document.getElementById('trendingList');
     
     if (topics.length === 0) {
-        trendingList.innerHTML = '<div class="trending-item">트렌딩 데이터를 불러오는 중...</div>';
+        trendingList.innerHTML = period in trendingData
+            ? '<div class="trending-item">아직 인기 토론이 없습니다.</div>'
+            : '<div class="trending-item">트렌딩 데이터를 불러오는 중...</div>';
         return;
     }
     
     trendingList.innerHTML = topics.map(topic => `
-        <div class="trending-item">
+        <div class="trending-item" onclick="location.href='/discussion/${topic.id}'">
             <span class="trending-rank">${topic.rank}</span>
             <div class="trending-content">
-                <span class="trending-topic">${topic.title}</span>
+                <span class="trending-topic">${escapeHtml(topic.title)}</span>
                 <div class="trending-stats">
                     <div class="trending-votes">
                         <span class="trending-agree">찬성 ${formatNumber(topic.agree)}</span>
@@ -54,29 +80,29 @@ function createTopicElement(topic) {
                      topic.heat === 'warm' ? '🌡 논란중' : '💭 활발';
     
     return `
-        <div class="topic-item">
+        <div class="topic-item" data-discussion-id="${topic.id}" onclick="location.href='/discussion/${topic.id}'">
             <div class="topic-main">
-                <h3 class="topic-title">${topic.title}</h3>
+                <h3 class="topic-title">${escapeHtml(topic.title)}</h3>
                 <div class="topic-meta">
                     <span class="topic-time">${topic.time}</span>
-                    <span class="topic-author">by ${topic.author}</span>
+                    <span class="topic-author">by ${escapeHtml(topic.author)}</span>
                 </div>
             </div>
             <div class="topic-stats">
                 <div class="vote-section">
                     <div class="vote-bar">
-                        <div class="vote-progress agree" style="width: ${topic.agreePercent}%;">
+                        <div class="vote-progress agree" data-stat-bar="agree" style="width: ${topic.agreePercent}%;">
                             <span class="vote-label">찬성 ${topic.agreePercent}%</span>
                         </div>
-                        <div class="vote-progress disagree" style="width: ${topic.disagreePercent}%;">
+                        <div class="vote-progress disagree" data-stat-bar="disagree" style="width: ${topic.disagreePercent}%;">
                             <span class="vote-label">반대 ${topic.disagreePercent}%</span>
                         </div>
                     </div>
-                    <div class="vote-count">총 ${topic.totalVotes.toLocaleString()}표</div>
+                    <div class="vote-count">총 <span data-stat-total>${topic.totalVotes.toLocaleString()}</span>표</div>
                 </div>
                 <div class="topic-engagement">
-                    <span class="comment-count">💬 ${topic.comments} 댓글</span>
-                    <span class="view-count">👁 ${topic.views} 조회</span>
+                    <span class="comment-count">💬 <span data-stat="comments">${topic.comments}</span> 댓글</span>
+                    <span class="view-count">👁 <span data-stat="views">${topic.views}</span> 조회</span>
                     <span class="heat-indicator ${topic.heat}">${heatLabel}</span>
                 </div>
             </div>
@@ -84,9 +110,85 @@ function createTopicElement(topic) {
     `;
 }
 
-function loadMoreTopics() {
-    // TODO: API로 데이터 받아오기
-    // 현재는 새로운 토론 시스템을 사용하므로 비활성화
+async function searchTopics(query) {
+    if (isLoading) {
+        return;
+    }
+    
+    isLoading = true;
+    try {
+        const response = await fetch(`/api/search?q=${encodeURIComponent(query)}&page=1`);
+        const result = await response.json();
+        
+        if (result.success) {
+            searchQuery = query;
+            searchPage = 1;
+            hasMoreData = result.has_more;
+            document.querySelector('.latest-section .section-title').textContent = `'${query}' 검색 결과`;
+            document.getElementById('topicsList').innerHTML = result.topics.length
+                ? result.topics.map(createTopicElement).join('')
+                : '<div class="topic-item">검색 결과가 없습니다.</div>';
+        } else {
+            alert(result.message);
+        }
+    } catch (error) {
+        alert('검색 중 오류가 발생했습니다.');
+        console.error(error);
+    } finally {
+        isLoading = false;
+    }
+}
+
+async function loadMoreSearchResults() {
+    isLoading = true;
+    try {
+        const response = await fetch(`/api/search?q=${encodeURIComponent(searchQuery)}&page=${searchPage + 1}`);
+        const result = await response.json();
+        
+        if (result.success) {
+            document.getElementById('topicsList')
+                .insertAdjacentHTML('beforeend', result.topics.map(createTopicElement).join(''));
+            searchPage += 1;
+            hasMoreData = result.has_more;
+        }
+    } catch (error) {
+        console.error(error);
+    } finally {
+        isLoading = false;
+    }
+}
+
+async function loadMoreTopics() {
+    if (isLoading || !hasMoreData) {
+        return;
+    }
+    if (searchQuery) {
+        return loadMoreSearchResults();
+    }
+    if (!nextCursor) {
+        return;
+    }
+    
+    isLoading = true;
+    const loadingIndicator = document.getElementById('loadingIndicator');
+    loadingIndicator?.classList.add('active');
+    
+    try {
+        const response = await fetch(`/api/discussions?cursor=${encodeURIComponent(nextCursor)}`);
+        const result = await response.json();
+        
+        if (result.success) {
+            document.getElementById('topicsList')
+                .insertAdjacentHTML('beforeend', result.topics.map(createTopicElement).join(''));
+            nextCursor = result.next_cursor;
+            hasMoreData = Boolean(nextCursor);
+        }
+    } catch (error) {
+        console.error(error);
+    } finally {
+        isLoading = false;
+        loadingIndicator?.classList.remove('active');
+    }
 }
 
 window.addEventListener('scroll', () => {
@@ -97,12 +199,12 @@ window.addEventListener('scroll', () => {
 
 document.addEventListener('DOMContentLoaded', function() {
     loadTrendingTopics();
+    fetchTrendingData();
+    setInterval(fetchTrendingData, 60 * 1000);
+    startStatsRefresh();
     
-    document.querySelectorAll('.topic-item').forEach(item => {
-        item.addEventListener('click', function() {
-            // 토론 상세 페이지로 이동
-        });
-    });
+    nextCursor = document.getElementById('topicsList')?.dataset.nextCursor || null;
+    hasMoreData = Boolean(nextCursor);
     
     document.querySelector('.create-topic-btn')?.addEventListener('click', function() {
         window.location.href = '/new-discussion';
@@ -117,17 +219,17 @@ document.addEventListener('DOMContentLoaded', function() {
     });
     
     document.querySelector('.search-btn')?.addEventListener('click', function() {
-        const searchValue = document.querySelector('.search-input').value;
+        const searchValue = document.querySelector('.search-input').value.trim();
         if (searchValue) {
-            // TODO: 검색 기능 구현
+            searchTopics(searchValue);
         }
     });
     
     document.querySelector('.search-input')?.addEventListener('keypress', function(e) {
         if (e.key === 'Enter') {
-            const searchValue = this.value;
+            const searchValue = this.value.trim();
             if (searchValue) {
-                // TODO: 검색 기능 구현
+                searchTopics(searchValue);
             }
         }
     });
@@ -0,0 +1,134 @@
+// 화면에 보이는 토론/댓글의 투표수, 조회수, 댓글수만 갱신 (/api/stats)
+const STATS_REFRESH_INTERVAL = 30 * 1000;
+const STATS_MAX_IDS = 200;
+
+function uniqueIds(elements, attribute) {
+    return [...new Set([...elements].map(el => parseInt(el.dataset[attribute])))];
+}
+
+function applyStats(element, stats) {
+    element.querySelectorAll('[data-stat]').forEach(el => {
+        if (el.dataset.stat in stats) {
+            el.textContent = stats[el.dataset.stat].toLocaleString();
+        }
+    });
+
+    // 찬반 비율 막대 (토론 목록)
+    if ('chan' in stats) {
+        const total = stats.chan + stats.ban;
+        const agreePercent = total > 0 ? Math.floor(stats.chan / total * 100) : 50;
+        const totalElement = element.querySelector('[data-stat-total]');
+        if (totalElement) {
+            totalElement.textContent = total.toLocaleString();
+        }
+        element.querySelectorAll('[data-stat-bar]').forEach(bar => {
+            const percent = bar.dataset.statBar === 'agree' ? agreePercent : 100 - agreePercent;
+            bar.style.width = `${percent}%`;
+            bar.querySelector('.vote-label').textContent = `${bar.dataset.statBar === 'agree' ? '찬성' : '반대'} ${percent}%`;
+        });
+    }
+}
+
+async function refreshStats() {
+    const discussionElements = document.querySelectorAll('[data-discussion-id]');
+    const commentElements = document.querySelectorAll('[data-comment-id]');
+    const discussionIds = uniqueIds(discussionElements, 'discussionId').slice(0, STATS_MAX_IDS);
+    const commentIds = uniqueIds(commentElements, 'commentId').slice(0, STATS_MAX_IDS - discussionIds.length);
+
+    if (discussionIds.length === 0 && commentIds.length === 0) {
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/stats', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ discussion_ids: discussionIds, comment_ids: commentIds })
+        });
+        const result = await response.json();
+
+        if (result.success) {
+            discussionElements.forEach(el => {
+                const stats = result.discussions[el.dataset.discussionId];
+                if (stats) {
+                    applyStats(el, stats);
+                }
+            });
+            commentElements.forEach(el => {
+                const stats = result.comments[el.dataset.commentId];
+                if (stats) {
+                    applyStats(el, stats);
+                }
+            });
+        }
+    } catch (error) {
+        console.error(error);
+    }
+}
+
+function startStatsRefresh() {
+    setInterval(() => {
+        if (!document.hidden) {
+            refreshStats();
+        }
+    }, STATS_REFRESH_INTERVAL);
+}
+
+function addToStat(element, stat, amount) {
+    element?.querySelectorAll(`[data-stat="${stat}"]`).forEach(el => {
+        const current = parseInt(el.textContent.replace(/,/g, '')) || 0;
+        el.textContent = (current + amount).toLocaleString();
+    });
+}
+
+// 실시간 변화량 적용 (/api/discussion/<id>/live)
+function applyStatsDelta(discussionId, delta) {
+    const discussionElement = document.querySelector(`[data-discussion-id="${discussionId}"]`);
+    Object.entries(delta).forEach(([stat, amount]) => {
+        if (stat !== 'comment_votes') {
+            addToStat(discussionElement, stat, amount);
+        }
+    });
+    Object.entries(delta.comment_votes || {}).forEach(([commentId, votes]) => {
+        const commentElement = document.querySelector(`[data-comment-id="${commentId}"]`);
+        Object.entries(votes).forEach(([stat, amount]) => addToStat(commentElement, stat, amount));
+    });
+}
+
+let liveStatsConnected = false;
+
+// 실시간 연결 중이면 내 투표도 변화량으로 반영되므로 연결이 없을 때만 다시 조회
+function refreshStatsUnlessLive() {
+    if (!liveStatsConnected) {
+        refreshStats();
+    }
+}
+
+function startLiveStats(discussionId) {
+    if (!window.EventSource) {
+        startStatsRefresh();
+        return;
+    }
+
+    let connected = false;
+    const source = new EventSource(`/api/discussion/${discussionId}/live`);
+    source.addEventListener('stats', e => applyStatsDelta(discussionId, JSON.parse(e.data)));
+    // 밀린 변화량을 버렸거나 재연결된 경우 전체 숫자를 다시 받음
+    source.addEventListener('resync', () => refreshStats());
+    source.addEventListener('open', () => {
+        if (connected) {
+            refreshStats();
+        }
+        connected = true;
+        liveStatsConnected = true;
+    });
+    source.addEventListener('error', () => {
+        liveStatsConnected = false;
+        // 접속자 수 제한(503) 등으로 재연결하지 않는 경우 폴링으로 전환
+        if (source.readyState === EventSource.CLOSED) {
+            startStatsRefresh();
+        }
+    });
+}
@@ -0,0 +1,74 @@
+"""
+Background periodic tasks, started lazily in each worker process
+"""
+import os
+import atexit
+import threading
+import logging
+from models import db
+
+logger = logging.getLogger(__name__)
+
+class PeriodicTask:
+    """주기적으로 실행되는 백그라운드 작업
+    
+    pre-fork 서버에서는 fork 이전에 만든 스레드가 자식 프로세스에 없으므로,
+    프로세스 ID를 확인해서 각 워커에서 처음 요청을 받을 때 스레드를 시작한다.
+    """
+    
+    def __init__(self, name, interval, func, run_at_exit=False):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.run_at_exit = run_at_exit
+        self._pid = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+    
+    def ensure_started(self, app):
+        """현재 프로세스에서 작업 스레드가 없으면 시작"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wake = threading.Event()
+            thread = threading.Thread(target=self._loop, args=(app,),
+                                      name=f'task-{self.name}', daemon=True)
+            thread.start()
+            if self.run_at_exit:
+                atexit.register(self.run_once, app)
+    
+    def wake(self):
+        """다음 주기를 기다리지 않고 바로 실행"""
+        self._wake.set()
+    
+    def run_once(self, app):
+        """앱 컨텍스트에서 작업을 한 번 실행"""
+        with app.app_context():
+            try:
+                return self.func()
+            except Exception as e:
+                logger.error(f"Background task {self.name} failed: {str(e)}")
+            finally:
+                db.session.remove()
+    
+    def _loop(self, app):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.run_once(app)
+
+
+_tasks = []
+
+def register_task(task):
+    """백그라운드 작업 등록"""
+    _tasks.append(task)
+    return task
+
+def start_tasks(app):
+    """등록된 모든 작업을 현재 프로세스에서 시작"""
+    for task in _tasks:
+        task.ensure_started(app)
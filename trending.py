@@ -0,0 +1,207 @@
+"""
+Trending engine - rolling time windows over time-bucketed activity counters
+"""
+import threading
+import time
+import heapq
+import logging
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta
+from models import db, STContent, STTrendingBucket, STVoteRecord
+from config import Config
+from utils import upsert_increment
+from view_rollup import daily_view_counts
+
+logger = logging.getLogger(__name__)
+
+def bucket_start(moment):
+    """시각이 속한 버킷의 시작 시각"""
+    minutes = Config.TRENDING_BUCKET_MINUTES
+    floored = moment.replace(second=0, microsecond=0)
+    return floored - timedelta(minutes=floored.minute % minutes)
+
+def record_vote(content_id, amount=1, at=None):
+    """투표 활동 기록 (호출자의 트랜잭션에 포함)"""
+    upsert_increment(STTrendingBucket,
+                     {'content_id': content_id, 'bucket_time': bucket_start(at or datetime.utcnow())},
+                     {'vote_count': amount, 'view_count': 0})
+
+def record_view(content_id, amount=1, at=None):
+    """조회 활동 기록 (호출자의 트랜잭션에 포함)"""
+    upsert_increment(STTrendingBucket,
+                     {'content_id': content_id, 'bucket_time': bucket_start(at or datetime.utcnow())},
+                     {'vote_count': 0, 'view_count': amount})
+
+def activity_score(votes, views):
+    """활동량 점수"""
+    return votes * Config.TRENDING_VOTE_WEIGHT + views * Config.TRENDING_VIEW_WEIGHT
+
+
+class TrendingEngine:
+    """기간별 인기순위를 증분 방식으로 유지하는 엔진
+    
+    닫힌 버킷(현재 버킷 이전)은 변하지 않으므로 한 번만 읽어서 각 기간의 점수에 더하고,
+    기간을 벗어난 버킷은 메모리에 남아 있는 값으로 빼준다. 매 갱신마다 DB에서 읽는 것은
+    새로 닫힌 버킷과 현재 열려 있는 버킷뿐이다.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._times = []        # 메모리에 있는 닫힌 버킷 시각 (정렬됨)
+        self._buckets = {}      # bucket_time -> {content_id: score}
+        self._scores = {}       # window key -> {content_id: score}
+        self._window_start = {} # window key -> 점수에 포함된 가장 오래된 버킷 시각
+        self._loaded_until = None
+        self._cached = None
+        self._cached_at = 0
+    
+    def reset(self):
+        """메모리 상태 초기화 (다음 조회 시 버킷 테이블에서 다시 적재)"""
+        with self._lock:
+            self.__init__()
+    
+    def _load_buckets(self, start, end):
+        """[start, end) 구간의 버킷을 시각별로 읽기"""
+        rows = db.session.query(STTrendingBucket.bucket_time, STTrendingBucket.content_id,
+                                STTrendingBucket.vote_count, STTrendingBucket.view_count)\
+                         .filter(STTrendingBucket.bucket_time >= start,
+                                 STTrendingBucket.bucket_time < end).all()
+        buckets = defaultdict(dict)
+        for bucket_time, content_id, votes, views in rows:
+            buckets[bucket_time][content_id] = activity_score(votes, views)
+        return buckets
+    
+    def _advance(self, current):
+        """새로 닫힌 버킷을 더하고, 기간을 벗어난 버킷을 빼기"""
+        max_minutes = max(minutes for _, _, minutes in Config.TRENDING_WINDOWS)
+        oldest = current - timedelta(minutes=max_minutes)
+        
+        if self._loaded_until is None:
+            self._loaded_until = oldest
+            for key, _, _ in Config.TRENDING_WINDOWS:
+                self._scores[key] = defaultdict(float)
+                self._window_start[key] = oldest
+        
+        # 새로 닫힌 버킷 추가
+        if self._loaded_until < current:
+            new_buckets = self._load_buckets(max(self._loaded_until, oldest), current)
+            for bucket_time in sorted(new_buckets):
+                self._times.append(bucket_time)
+                self._buckets[bucket_time] = new_buckets[bucket_time]
+            self._loaded_until = current
+            # 일단 모든 기간에 더하고, 기간 밖의 버킷은 아래에서 한 번만 빼줌
+            for key, _, _ in Config.TRENDING_WINDOWS:
+                scores = self._scores[key]
+                for bucket_scores in new_buckets.values():
+                    for content_id, score in bucket_scores.items():
+                        scores[content_id] += score
+        
+        # 기간을 벗어난 버킷 제거
+        for key, _, minutes in Config.TRENDING_WINDOWS:
+            cutoff = current - timedelta(minutes=minutes)
+            lo = bisect_left(self._times, self._window_start[key])
+            hi = bisect_left(self._times, cutoff)
+            scores = self._scores[key]
+            for bucket_time in self._times[lo:hi]:
+                for content_id, score in self._buckets[bucket_time].items():
+                    scores[content_id] -= score
+                    if scores[content_id] <= 0:
+                        del scores[content_id]
+            self._window_start[key] = max(self._window_start[key], cutoff)
+        
+        # 가장 긴 기간도 벗어난 버킷은 메모리에서 삭제
+        expired = bisect_left(self._times, oldest)
+        for bucket_time in self._times[:expired]:
+            del self._buckets[bucket_time]
+        del self._times[:expired]
+    
+    def _build(self):
+        current = bucket_start(datetime.utcnow())
+        self._advance(current)
+        
+        # 현재 열려 있는 버킷은 매번 새로 읽음 (모든 기간에 포함)
+        open_bucket = self._load_buckets(current, current + timedelta(minutes=Config.TRENDING_BUCKET_MINUTES))
+        open_scores = open_bucket.get(current, {})
+        
+        rankings = {}
+        for key, _, _ in Config.TRENDING_WINDOWS:
+            scores = self._scores[key]
+            candidates = set(scores) | set(open_scores)
+            rankings[key] = heapq.nlargest(
+                Config.TRENDING_LIMIT, candidates,
+                key=lambda content_id: scores.get(content_id, 0) + open_scores.get(content_id, 0))
+        
+        # 순위에 오른 토론 정보는 한 번에 조회
+        content_ids = {content_id for ranking in rankings.values() for content_id in ranking}
+        discussions = {}
+        if content_ids:
+            discussions = {d.id: d for d in STContent.query.filter(STContent.id.in_(content_ids),
+                                                                   STContent.is_deleted.is_(False)).all()}
+        
+        trending = {}
+        for key, label, _ in Config.TRENDING_WINDOWS:
+            topics = []
+            for content_id in rankings[key]:
+                discussion = discussions.get(content_id)
+                if not discussion:
+                    continue
+                topics.append({
+                    'rank': len(topics) + 1,
+                    'id': discussion.id,
+                    'title': discussion.subject,
+                    'agree': discussion.chan or 0,
+                    'disagree': discussion.ban or 0,
+                    'views': discussion.view_count or 0
+                })
+            trending[label] = topics
+        return trending
+    
+    def get_trending(self):
+        """기간별 인기순위 (캐시된 결과)"""
+        with self._lock:
+            now = time.monotonic()
+            if self._cached is None or now - self._cached_at >= Config.TRENDING_CACHE_SECONDS:
+                self._cached = self._build()
+                self._cached_at = now
+            return self._cached
+
+
+trending_engine = TrendingEngine()
+
+def rebuild_trending_buckets():
+    """투표/조회 기록으로부터 기간 내 버킷을 다시 생성 (오프라인 작업)"""
+    max_minutes = max(minutes for _, _, minutes in Config.TRENDING_WINDOWS)
+    since = bucket_start(datetime.utcnow() - timedelta(minutes=max_minutes))
+    
+    counters = defaultdict(lambda: [0, 0])
+    
+    votes = db.session.query(STVoteRecord.content_id, STVoteRecord.created_at)\
+                      .filter(STVoteRecord.content_id.isnot(None),
+                              STVoteRecord.created_at >= since)
+    for content_id, created_at in votes.yield_per(10000):
+        counters[(content_id, bucket_start(created_at))][0] += 1
+    
+    # 조회 기록은 날짜 단위이므로 해당 날짜의 첫 버킷에 적재 (압축된 일별 집계 포함)
+    for (content_id, view_date), count in daily_view_counts(since.date()).items():
+        bucket_time = max(datetime.combine(view_date, datetime.min.time()), since)
+        counters[(content_id, bucket_time)][1] += count
+    
+    STTrendingBucket.query.filter(STTrendingBucket.bucket_time >= since).delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(STTrendingBucket, [
+        {'content_id': content_id, 'bucket_time': bucket_time, 'vote_count': votes, 'view_count': views}
+        for (content_id, bucket_time), (votes, views) in counters.items()
+    ])
+    db.session.commit()
+    trending_engine.reset()
+    logger.info(f"Rebuilt {len(counters)} trending buckets since {since}")
+    return len(counters)
+
+def prune_trending_buckets():
+    """가장 긴 기간을 벗어난 버킷 삭제"""
+    max_minutes = max(minutes for _, _, minutes in Config.TRENDING_WINDOWS)
+    cutoff = bucket_start(datetime.utcnow() - timedelta(minutes=max_minutes))
+    deleted = STTrendingBucket.query.filter(STTrendingBucket.bucket_time < cutoff)\
+                                    .delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
@@ -2,9 +2,18 @@
 Utility functions for the application
 """
 from functools import wraps
-from flask import jsonify, session
-from models import db, STLevel, STVoteRecord
+from flask import jsonify, session, g, has_app_context, request, current_app
+from werkzeug.http import is_resource_modified
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from models import db, STContent, STLevel, STVoteRecord, STComment, STUser, STPointLedger, level_tier
+from cache import LRUCache
 from config import Config
+from datetime import datetime
+import base64
+import hashlib
+import json
 import secrets
 import logging
 
@@ -18,32 +27,60 @@ def get_session_id(session):
         session['session_id'] = secrets.token_urlsafe(32)
     return session['session_id']
 
-def add_points(user_id, points, reason=""):
-    """사용자에게 포인트를 추가하는 함수"""
+def add_points(user_id, points, reason):
+    """사용자에게 포인트를 추가하는 함수
+    
+    포인트 원장에 기록만 하고(커밋은 호출자가 담당), ST_LEVEL_TB 반영은 백그라운드 집계가 처리한다.
+    """
     if not user_id:
         return
+    if reason not in Config.POINT_REASONS:
+        raise ValueError(f"Unknown point reason: {reason}")
     
-    level = STLevel.query.filter_by(user_id=user_id).first()
-    if not level:
-        level = STLevel(user_id=user_id, point=0)
-        db.session.add(level)
+    db.session.add(STPointLedger(user_id=user_id, points=points, reason=reason))
+    logger.info(f"Added {points} points to user {user_id} for {Config.POINT_REASONS[reason]}")
+
+class LevelInfo:
+    """요청 간 캐시에 보관하는 읽기 전용 레벨 정보 (세션에 묶이지 않음)"""
+    __slots__ = ('user_id', 'point', 'level_name', 'level_icon', 'voting_power')
     
-    level.point += points
-    db.session.commit()
-    logger.info(f"Added {points} points to user {user_id} for {reason}")
+    def __init__(self, user_id, point):
+        tier = level_tier(point)
+        self.user_id = user_id
+        self.point = point or 0
+        self.level_name = tier.name
+        self.level_icon = tier.icon
+        self.voting_power = tier.power
+
+_level_cache = LRUCache(max_entries=Config.LEVEL_CACHE_MAX_ENTRIES)
 
 def get_user_level_info(user_id):
-    """사용자의 레벨 정보를 가져오는 함수"""
+    """사용자의 레벨 정보를 가져오는 함수 (요청/프로세스 단위 캐시, DB에 쓰지 않음)"""
     if not user_id:
         return None
     
-    level = STLevel.query.filter_by(user_id=user_id).first()
-    if not level:
-        level = STLevel(user_id=user_id, point=0)
-        db.session.add(level)
-        db.session.commit()
+    request_cache = g.setdefault('level_info', {}) if has_app_context() else {}
+    info = request_cache.get(user_id) or _level_cache.get(user_id)
+    if info is None:
+        # 레벨 행이 아직 없으면 0포인트로 취급 (행은 회원가입/포인트 집계 시 생성)
+        point = db.session.query(STLevel.point).filter_by(user_id=user_id).scalar()
+        info = LevelInfo(user_id, point)
+        _level_cache.set(user_id, info, Config.LEVEL_CACHE_SECONDS)
+    request_cache[user_id] = info
     
-    return level
+    return info
+
+def invalidate_level_info(*user_ids):
+    """포인트가 바뀐 사용자의 레벨 캐시 삭제 (인자가 없으면 전체 삭제)"""
+    request_cache = g.get('level_info', {}) if has_app_context() else {}
+    if not user_ids:
+        _level_cache.clear()
+        request_cache.clear()
+        return
+    
+    _level_cache.delete(*user_ids)
+    for user_id in user_ids:
+        request_cache.pop(user_id, None)
 
 def check_vote_record(user_id, session_id, content_id=None, comment_id=None):
     """투표 기록 확인"""
@@ -59,8 +96,31 @@ def check_vote_record(user_id, session_id, content_id=None, comment_id=None):
     
     return query.first()
 
+def get_vote_state(user_id, session_id, content_id=None, comment_ids=()):
+    """토론과 여러 댓글에 대한 투표 기록을 한 번에 조회
+    
+    반환: (토론 투표 종류 또는 None, {댓글 id: 투표 종류})
+    """
+    targets = []
+    if content_id:
+        targets.append(STVoteRecord.content_id == content_id)
+    if comment_ids:
+        targets.append(STVoteRecord.comment_id.in_(list(comment_ids)))
+    if not targets or not (user_id or session_id):
+        return None, {}
+    
+    viewer = STVoteRecord.user_id == user_id if user_id else STVoteRecord.session_id == session_id
+    content_vote, comment_votes = None, {}
+    rows = db.session.query(STVoteRecord.comment_id, STVoteRecord.vote_type).filter(viewer, or_(*targets))
+    for comment_id, vote_type in rows:
+        if comment_id:
+            comment_votes[comment_id] = vote_type
+        else:
+            content_vote = vote_type
+    return content_vote, comment_votes
+
 def save_vote_record(user_id, session_id, vote_type, content_id=None, comment_id=None):
-    """투표 기록 저장"""
+    """투표 기록 저장 (중복이면 IntegrityError, 커밋은 호출자가 담당)"""
     vote_record = STVoteRecord(
         user_id=user_id,
         session_id=session_id if not user_id else None,
@@ -69,9 +129,296 @@ def save_vote_record(user_id, session_id, vote_type, content_id=None, comment_id
         vote_type=vote_type
     )
     db.session.add(vote_record)
-    db.session.commit()
+    db.session.flush()
     return vote_record
 
+def _upsert_increment_stmt(model, key_names, increment_names):
+    """고유 키 충돌 시 카운터를 더하는 INSERT 문 (지원하지 않는 DB는 None)"""
+    table = model.__table__
+    dialect = db.engine.dialect.name
+    
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        return stmt.on_duplicate_key_update(
+            {name: table.c[name] + stmt.inserted[name] for name in increment_names})
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=list(key_names),
+            set_={name: table.c[name] + stmt.excluded[name] for name in increment_names})
+    return None
+
+def upsert_increment_many(model, key_names, rows):
+    """여러 행의 카운터를 한 번에 증가시키고, 없으면 생성 (커밋은 호출자가 담당)"""
+    if not rows:
+        return
+    increment_names = [name for name in rows[0] if name not in key_names]
+    stmt = _upsert_increment_stmt(model, key_names, increment_names)
+    if stmt is not None:
+        db.session.execute(stmt, rows)
+        return
+    
+    # 그 외 DB는 UPDATE 후 없으면 INSERT
+    table = model.__table__
+    for row in rows:
+        updated = model.query.filter_by(**{name: row[name] for name in key_names}).update(
+            {table.c[name]: table.c[name] + row[name] for name in increment_names},
+            synchronize_session=False)
+        if not updated:
+            db.session.execute(table.insert().values(row))
+
+INSERT_IGNORE_CHUNK_SIZE = 500  # 다중 VALUES 한 문장에 넣을 최대 행 수 (바인드 변수 수 제한)
+
+def insert_ignore(model, rows):
+    """여러 행을 INSERT하고 고유 키가 충돌하는 행은 무시, 실제로 추가된 행 수 반환 (커밋은 호출자가 담당)
+
+    executemany의 rowcount는 DB 드라이버마다 믿을 수 없으므로 다중 VALUES 한 문장씩 실행한다.
+    """
+    if not rows:
+        return 0
+    table = model.__table__
+    dialect = db.engine.dialect.name
+    
+    stmt = None
+    if dialect == 'mysql':
+        stmt = table.insert().prefix_with('IGNORE')
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).on_conflict_do_nothing()
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).on_conflict_do_nothing()
+    
+    inserted = 0
+    if stmt is not None:
+        for start in range(0, len(rows), INSERT_IGNORE_CHUNK_SIZE):
+            inserted += db.session.execute(stmt.values(rows[start:start + INSERT_IGNORE_CHUNK_SIZE])).rowcount
+        return inserted
+    
+    # 그 외 DB는 행마다 savepoint 안에서 INSERT하고 충돌하면 그 행만 되돌림
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert().values(row))
+            inserted += 1
+        except IntegrityError:
+            pass
+    return inserted
+
+def upsert_increment(model, keys, increments):
+    """고유 키 기준으로 카운터를 DB에서 증가시키고, 없으면 생성 (커밋은 호출자가 담당)"""
+    upsert_increment_many(model, list(keys), [{**keys, **increments}])
+
+def upsert_replace(model, key_names, row):
+    """고유 키 기준으로 행을 덮어쓰고, 없으면 생성 (커밋은 호출자가 담당)"""
+    table = model.__table__
+    values = {name: value for name, value in row.items() if name not in key_names}
+    dialect = db.engine.dialect.name
+    
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        db.session.execute(insert(table).values(row).on_duplicate_key_update(values))
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        db.session.execute(insert(table).values(row).on_conflict_do_update(
+            index_elements=list(key_names), set_=values))
+    else:
+        # 그 외 DB는 UPDATE 후 없으면 INSERT
+        updated = model.query.filter_by(**{name: row[name] for name in key_names}).update(
+            values, synchronize_session=False)
+        if not updated:
+            db.session.execute(table.insert().values(row))
+
+def encode_cursor(*values):
+    """페이지네이션 커서 인코딩 (datetime은 ISO 문자열로 변환)"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, *types):
+    """페이지네이션 커서 디코딩, 잘못된 커서는 None 반환"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(values) != len(types):
+            return None
+        return tuple(datetime.fromisoformat(v) if t is datetime else t(v)
+                     for v, t in zip(values, types))
+    except (ValueError, TypeError):
+        return None
+
+def get_discussion_heat(discussion):
+    """토론의 열기 표시 (hot: 인기, warm: 논란중, '': 활발)"""
+    comment_count = discussion.comment_count or 0
+    view_count = discussion.view_count or 0
+    if comment_count >= Config.HOT_COMMENT_THRESHOLD or view_count >= Config.HOT_VIEW_THRESHOLD:
+        return 'hot'
+    
+    chan = discussion.chan or 0
+    ban = discussion.ban or 0
+    total = chan + ban
+    if total >= Config.WARM_MIN_VOTES and abs(chan - ban) * 100 <= total * Config.WARM_MAX_GAP_PERCENT:
+        return 'warm'
+    return ''
+
+def serialize_discussion(discussion):
+    """토론 목록 아이템 JSON 변환 (script.js의 createTopicElement 형식)"""
+    chan = discussion.chan or 0
+    ban = discussion.ban or 0
+    total = chan + ban
+    agree_percent = int(chan / total * 100) if total > 0 else 50
+    
+    return {
+        'id': discussion.id,
+        'title': discussion.subject,
+        'time': discussion.insert_time.strftime('%Y-%m-%d %H:%M'),
+        'author': discussion.author.nick if discussion.author else 'Unknown',
+        'agreePercent': agree_percent,
+        'disagreePercent': 100 - agree_percent,
+        'totalVotes': total,
+        'comments': discussion.comment_count or 0,
+        'views': discussion.view_count or 0,
+        'heat': get_discussion_heat(discussion)
+    }
+
+def get_comment_page(content_id, sort_order='best', cursor=None, limit=None):
+    """댓글 한 페이지와 다음 페이지 커서를 반환 (작성자/레벨 정보는 한 번에 로드)"""
+    limit = limit or Config.COMMENTS_PAGE_SIZE
+    query = STComment.query.options(joinedload(STComment.author).joinedload(STUser.level_info))\
+                           .filter(STComment.content_id == content_id)
+    
+    if sort_order == 'newest':
+        # 최신순 - (insert_time, id) 커서
+        if cursor:
+            cursor_time, cursor_id = cursor
+            query = query.filter(or_(
+                STComment.insert_time < cursor_time,
+                and_(STComment.insert_time == cursor_time, STComment.id < cursor_id)
+            ))
+        query = query.order_by(STComment.insert_time.desc(), STComment.id.desc())
+    else:
+        # 추천순 - (score, insert_time, id) 커서, 인덱스 범위 조회
+        if cursor:
+            cursor_score, cursor_time, cursor_id = cursor
+            query = query.filter(or_(
+                STComment.score < cursor_score,
+                and_(STComment.score == cursor_score, STComment.insert_time < cursor_time),
+                and_(STComment.score == cursor_score, STComment.insert_time == cursor_time,
+                     STComment.id < cursor_id)
+            ))
+        query = query.order_by(STComment.score.desc(), STComment.insert_time.desc(), STComment.id.desc())
+    
+    # 다음 페이지 존재 여부 확인을 위해 하나 더 조회
+    comments = query.limit(limit + 1).all()
+    if len(comments) <= limit:
+        return comments, None
+    
+    comments = comments[:limit]
+    return comments, comment_cursor(comments[-1], sort_order)
+
+def comment_cursor(comment, sort_order='best'):
+    """해당 댓글 다음부터 이어지는 페이지 커서"""
+    if sort_order == 'newest':
+        return encode_cursor(comment.insert_time, comment.id)
+    return encode_cursor(comment.score, comment.insert_time, comment.id)
+
+def decode_comment_cursor(cursor, sort_order):
+    """댓글 정렬 방식에 맞는 커서 디코딩"""
+    if sort_order == 'newest':
+        return decode_cursor(cursor, datetime, int)
+    return decode_cursor(cursor, int, datetime, int)
+
+def serialize_comment(comment):
+    """댓글 JSON 변환"""
+    author = None
+    if comment.author:
+        level = comment.author.level_info
+        author = {
+            'nick': comment.author.nick,
+            'level_icon': level.level_icon if level else None,
+            'level_name': level.level_name if level else None,
+            'voting_power': level.voting_power if level else None,
+            'point': level.point if level else None
+        }
+    
+    return {
+        'id': comment.id,
+        'content': comment.content,
+        'chanban': comment.chanban,
+        'vote_plus': comment.vote_plus or 0,
+        'vote_minus': comment.vote_minus or 0,
+        'time': comment.insert_time.strftime('%Y-%m-%d %H:%M'),
+        'author': author
+    }
+
+def content_version_changes():
+    """토론 페이지에 보이는 값을 바꾸는 UPDATE에 함께 넣는 버전 갱신 (조건부 GET 검증자)"""
+    return {STContent.version: STContent.version + 1}
+
+def feed_query(position=None):
+    """삭제되지 않은 토론 최신순 쿼리 (position은 decode_cursor로 얻은 마지막 (insert_time, id))"""
+    query = STContent.query.filter(STContent.is_deleted.is_(False))
+    if position:
+        cursor_time, cursor_id = position
+        # OFFSET 대신 마지막 위치 이후부터 인덱스로 바로 탐색
+        query = query.filter(or_(
+            STContent.insert_time < cursor_time,
+            and_(STContent.insert_time == cursor_time, STContent.id < cursor_id)
+        ))
+    return query.order_by(STContent.insert_time.desc(), STContent.id.desc())
+
+def page_versions(query, limit):
+    """목록 한 페이지에 보이는 토론들의 (id, version) - 다른 토론이 바뀌어도 그대로인 캐시 키/검증자"""
+    return tuple(tuple(row) for row in query.with_entities(STContent.id, STContent.version).limit(limit))
+
+def make_etag(*parts):
+    """검증자 값들로 ETag 생성 (배포/자산 빌드가 바뀌면 달라짐)"""
+    parts += (Config.RELEASE_VERSION, current_app.config.get('ASSETS_VERSION', ''))
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+def _revalidate(response, etag):
+    # 본문 바이트가 아니라 내용의 버전으로 만든 값이고 gzip 응답도 같은 값이므로 약한 ETag
+    response.set_etag(etag, weak=True)
+    # 보는 사람(로그인/세션)마다 내용이 다르므로 공유 캐시에는 저장하지 않고, 브라우저는 매번 확인
+    # (수정 시각만으로는 보는 사람을 구분할 수 없어 Last-Modified/If-Modified-Since는 쓰지 않음)
+    response.vary.add('Cookie')
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def not_modified(etag):
+    """조건부 요청의 ETag가 현재와 같으면 304 응답, 아니면 None (본문을 만들기 전에 호출)"""
+    if is_resource_modified(request.environ, etag=etag):
+        return None
+    return _revalidate(current_app.response_class(status=304), etag)
+
+def with_validators(response, etag):
+    """응답에 ETag 추가"""
+    return _revalidate(current_app.make_response(response), etag)
+
+def conditional_json(validators):
+    """본문을 만들기 전에 검증자로 ETag를 만들어 같으면 304, 다르면 JSON 응답에 ETag 추가
+
+    validators: 응답 내용을 결정하는 값(보이는 토론의 버전, 요청 인자 등)의 튜플을 반환하는 함수
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            etag = make_etag(request.endpoint, *validators())
+            cached = not_modified(etag)
+            if cached is not None:
+                return cached
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            return _revalidate(response, etag)
+        return decorated_function
+    return decorator
+
 def require_login(f):
     """로그인 필수 데코레이터"""
     @wraps(f)
@@ -0,0 +1,105 @@
+"""
+Write-behind view counter - dedupes daily viewers in memory and flushes in bulk
+"""
+import threading
+import logging
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from models import db, STContent, STViewRecord
+from config import Config
+from trending import record_view
+from tasks import PeriodicTask, register_task
+from utils import insert_ignore
+
+logger = logging.getLogger(__name__)
+
+class ViewCounter:
+    """조회 기록을 메모리에 모아 두었다가 한 트랜잭션으로 저장
+    
+    저장은 토론별로 다중 VALUES INSERT IGNORE 한 번씩 하고 그 문장이 실제로 추가한 행 수만큼만
+    조회수를 올리므로, 다른 워커가 같은 기록을 먼저 저장했어도 중복 집계되지 않는다.
+    저장에 실패한 배치는 다시 대기열에 넣는다.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._day = None
+        self._seen = set()
+        self._pending = []
+    
+    def record(self, content_id, user_id=None, session_id=None):
+        """조회 기록 (오늘 처음 조회한 경우만 대기열에 추가, DB 접근 없음)"""
+        today = date.today()
+        viewer = ('user', user_id) if user_id else ('session', session_id)
+        
+        with self._lock:
+            if self._day != today:
+                self._day = today
+                self._seen = set()
+            # 메모리 상한을 넘으면 비우고 DB 고유 제약조건으로 중복 제거
+            if len(self._seen) >= Config.VIEW_SEEN_MAX_ENTRIES:
+                self._seen = set()
+            
+            key = (content_id, viewer)
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            self._pending.append({
+                'user_id': user_id,
+                'session_id': session_id if not user_id else None,
+                'content_id': content_id,
+                'view_date': today,
+                'created_at': datetime.utcnow()
+            })
+            batch_full = len(self._pending) >= Config.VIEW_FLUSH_BATCH_SIZE
+        
+        if batch_full:
+            view_flush_task.wake()
+        return True
+    
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+    
+    def flush(self):
+        """대기 중인 조회 기록과 조회수를 한 트랜잭션으로 저장"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        
+        try:
+            # 대기 중에 삭제된 토론의 기록은 버림 (백그라운드 삭제가 지운 뒤 다시 생기지 않도록)
+            live = {id for (id,) in db.session.query(STContent.id).filter(
+                STContent.id.in_({row['content_id'] for row in batch}), STContent.is_deleted.is_(False))}
+            
+            by_content = defaultdict(list)
+            for row in batch:
+                if row['content_id'] in live:
+                    by_content[row['content_id']].append(row)
+            
+            inserted = Counter()
+            for content_id, rows in by_content.items():
+                count = insert_ignore(STViewRecord, rows)
+                if count:
+                    inserted[content_id] = count
+            
+            for content_id, count in inserted.items():
+                STContent.query.filter_by(id=content_id)\
+                    .update({STContent.view_count: STContent.view_count + count}, synchronize_session=False)
+                record_view(content_id, count)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            with self._lock:
+                self._pending = batch + self._pending
+            raise
+        
+        total = sum(inserted.values())
+        logger.info(f"Flushed {total} views for {len(inserted)} discussions")
+        return total
+
+
+view_counter = ViewCounter()
+view_flush_task = register_task(PeriodicTask('view-flush', Config.VIEW_FLUSH_SECONDS,
+                                             view_counter.flush, run_at_exit=True))
@@ -0,0 +1,77 @@
+"""
+Daily rollup and retention for ST_VIEW_RECORD_TB
+"""
+import logging
+from datetime import date, timedelta
+from models import db, STViewRecord, STViewDaily
+from config import Config
+from utils import upsert_increment_many
+from tasks import PeriodicTask, register_task
+
+logger = logging.getLogger(__name__)
+
+def rollup_cutoff():
+    """원본 조회 기록을 보관하는 첫 날짜 (오늘 기록은 항상 보관)"""
+    return date.today() - timedelta(days=max(1, Config.VIEW_RECORD_RETENTION_DAYS))
+
+def rollup_view_records(cutoff=None, batch_size=None):
+    """보관 기간이 지난 조회 기록을 일별 집계로 압축하고 원본을 삭제
+    
+    날짜 하나씩, 원본 행을 일정 개수씩 집계에 더하고 같은 트랜잭션에서 삭제하므로
+    중간에 중단되어도 다시 실행하면 이어서 처리된다. 배치는 (view_date, id) 인덱스로 읽는다.
+    """
+    cutoff = cutoff or rollup_cutoff()
+    batch_size = batch_size or Config.VIEW_ROLLUP_BATCH_SIZE
+    compacted = 0
+    
+    while True:
+        oldest = db.session.query(db.func.min(STViewRecord.view_date))\
+                           .filter(STViewRecord.view_date < cutoff).scalar()
+        if oldest is None:
+            break
+        
+        rows = db.session.query(STViewRecord.id, STViewRecord.content_id)\
+                         .filter(STViewRecord.view_date == oldest)\
+                         .order_by(STViewRecord.id).limit(batch_size).all()
+        
+        counts = {}
+        for _, content_id in rows:
+            counts[content_id] = counts.get(content_id, 0) + 1
+        upsert_increment_many(STViewDaily, ['content_id', 'view_date'], [
+            {'content_id': content_id, 'view_date': oldest, 'view_count': count}
+            for content_id, count in counts.items()
+        ])
+        deleted = STViewRecord.query.filter(STViewRecord.id.in_([row.id for row in rows]))\
+                                    .delete(synchronize_session=False)
+        if deleted != len(rows):
+            # 다른 워커가 같은 배치를 먼저 압축함 - 중복 집계하지 않도록 되돌리고 다시 읽음
+            db.session.rollback()
+            continue
+        db.session.commit()
+        compacted += len(rows)
+    
+    if compacted:
+        logger.info(f"Compacted {compacted} view records older than {cutoff}")
+    return compacted
+
+def daily_view_counts(since):
+    """since 이후 토론별/날짜별 조회자 수 (압축된 집계와 원본 기록을 합침)
+    
+    반환: {(content_id, view_date): count}
+    """
+    counts = {}
+    compacted = db.session.query(STViewDaily.content_id, STViewDaily.view_date, STViewDaily.view_count)\
+                          .filter(STViewDaily.view_date >= since)
+    for content_id, view_date, count in compacted.yield_per(10000):
+        counts[(content_id, view_date)] = counts.get((content_id, view_date), 0) + count
+    
+    raw = db.session.query(STViewRecord.content_id, STViewRecord.view_date,
+                           db.func.count(STViewRecord.id))\
+                    .filter(STViewRecord.view_date >= since)\
+                    .group_by(STViewRecord.content_id, STViewRecord.view_date)
+    for content_id, view_date, count in raw.yield_per(10000):
+        counts[(content_id, view_date)] = counts.get((content_id, view_date), 0) + count
+    return counts
+
+
+view_rollup_task = register_task(PeriodicTask('view-rollup', Config.VIEW_ROLLUP_SECONDS, rollup_view_records))